@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models.signals import post_save
+
+from accounts.models import User
+from cart.models import Cart
+
+
+def create_cart_for_new_user(sender, instance, created, **kwargs):
+    # The receiver carts used to install: one Cart row per new user.
+    if created:
+        Cart.objects.create(user=instance)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time user registration and a bulk user import with carts created "
+        "lazily (current) and eagerly on post_save (before). Passwords are "
+        "left unusable so hashing does not dominate. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000)
+        parser.add_argument('--import-users', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        results = {}
+        for label, prefix, eager in (
+            ('before (eager carts)', 'bench-eager', True),
+            ('after (lazy carts)', 'bench-lazy', False),
+        ):
+            if eager:
+                post_save.connect(create_cart_for_new_user, sender=User)
+            try:
+                results[label] = (
+                    self.registration(prefix, options['users']),
+                    self.bulk_import(prefix, options['import_users']),
+                )
+            finally:
+                post_save.disconnect(create_cart_for_new_user, sender=User)
+
+        for label, (registration, bulk) in results.items():
+            self.stdout.write(
+                f"{label}: registration {registration:.0f} users/s, "
+                f"import {bulk:.0f} users/s"
+            )
+
+    def registration(self, prefix, count):
+        # One transaction per user, like RegisterAPI under autocommit, so
+        # these are committed and deleted afterwards.
+        created = []
+        start = time.perf_counter()
+        for i in range(count):
+            with transaction.atomic():
+                created.append(User.objects.create_user(
+                    username=f'{prefix}-reg-{i}', email=f'{prefix}-reg-{i}@example.com', password=None,
+                ).id)
+        elapsed = time.perf_counter() - start
+        User.objects.filter(id__in=created).delete()
+        return count / elapsed
+
+    def bulk_import(self, prefix, count):
+        # An import script creating users one save() at a time in a single
+        # transaction: the only way to get the post_save carts.
+        with transaction.atomic():
+            start = time.perf_counter()
+            for i in range(count):
+                User.objects.create_user(
+                    username=f'{prefix}-imp-{i}', email=f'{prefix}-imp-{i}@example.com', password=None,
+                )
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return count / elapsed
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_emailotp'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailotp',
+            index=models.Index(fields=['expires_at'], name='email_otp_expires_idx'),
+        ),
+    ]
@@ -43,5 +43,10 @@ class EmailOTP(models.Model):
     otp = models.CharField(max_length=6)
     expires_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], name='email_otp_expires_idx'),
+        ]
+
     def is_expired(self):
         return timezone.now() >= self.expires_at
\ No newline at end of file
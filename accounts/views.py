@@ -1,4 +1,5 @@
 from __future__ import annotations
+import logging
 from django.http import JsonResponse
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
@@ -11,12 +12,14 @@ from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth import get_user_model
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from cart.models import Cart
+from cart.guest import guest_cart_token, merge_guest_cart
 from django.contrib.auth import authenticate
 from utils.email import send_verification_email, send_reset_password_email, send_locked_email
 from email_validator import validate_email, EmailNotValidError
 from accounts.models import EmailOTP
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 ### USER REGISTRATION AND LOGIN VIEW###
 class RegisterAPI(APIView):
@@ -110,6 +113,16 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         self.user.save(update_fields=["last_login"])
         data.update({"message": "User logined successfully."})
 
+        cart_token = guest_cart_token(self.context["request"])
+        if cart_token:
+            # The guest cart is a convenience; failing to merge it must not
+            # fail the login.
+            try:
+                data["cart_items_merged"] = merge_guest_cart(self.user.id, cart_token)
+            except Exception:
+                logger.exception("Merging guest cart failed for user %s.", self.user.id)
+                data["cart_items_merged"] = 0
+
         return data
 
 class LoginAPIView(TokenObtainPairView):
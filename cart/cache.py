@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.db import transaction
+
+from utils.cache import tagged_cache
+
+# Combo windows open and close without a cache bump, so summaries are
+# only kept briefly.
+CART_SUMMARY_TIMEOUT = 60
+
+
+def cart_tag(user_id):
+    return f'cart:{user_id}'
+
+
+def notify_cart_changed(user_id):
+    transaction.on_commit(lambda: tagged_cache.invalidate_tags([cart_tag(user_id)]))
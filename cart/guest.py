@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import logging
+import re
+import secrets
+import threading
+import time
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.db import DatabaseError, connections, transaction
+from django.utils import timezone
+
+from .cache import notify_cart_changed
+from .models import GuestCart
+from .services import MAX_LINE_QUANTITY, add_items
+
+logger = logging.getLogger(__name__)
+
+GUEST_CART_HEADER = 'HTTP_X_CART_TOKEN'
+GUEST_CART_TIMEOUT = int(timedelta(days=30).total_seconds())
+# Seconds between write-behind flushes of changed guest carts to the DB.
+FLUSH_INTERVAL = 5
+# Tokens with no cart are cached as empty this long, so probes for unknown
+# tokens stay off the database.
+MISSING_CART_TIMEOUT = 300
+# How long a login holds a guest cart it is merging. Longer than
+# FLUSH_INTERVAL, so the cart's deletion reaches the DB first.
+CLAIM_TIMEOUT = 60
+TOKEN_PATTERN = re.compile(r'^[A-Za-z0-9_-]{16,64}$')
+
+
+def guest_cart_token(request):
+    """The anonymous cart token sent with a request, if it looks valid."""
+    token = request.META.get(GUEST_CART_HEADER) or request.data.get('cart_token')
+    if isinstance(token, str) and TOKEN_PATTERN.match(token):
+        return token
+    return None
+
+
+def apply_to_items(items, adds, sets):
+    # cart.services.fold_operations() output applied to {product_id: qty}.
+    items = dict(items)
+    for product_id, quantity in sets.items():
+        if quantity:
+            items[product_id] = quantity
+        else:
+            items.pop(product_id, None)
+    for product_id, quantity in adds.items():
+        items[product_id] = min(items.get(product_id, 0) + quantity, MAX_LINE_QUANTITY)
+    return items
+
+
+class GuestCartStore:
+    """Guest carts ({product_id: quantity}) keyed by an anonymous token.
+
+    Reads and writes go to a Django cache backend. Changed carts are copied
+    to GuestCart rows by a background thread, so the request never waits on
+    the database and a cart evicted from the cache can still be read back.
+
+    Deployments with several worker processes need a shared backend (e.g.
+    Redis). With the local-memory default each process keeps its own copy:
+    a process can serve, and write back, a cart another process has since
+    changed.
+    """
+
+    def __init__(self, alias='default', prefix='guest-cart', timeout=GUEST_CART_TIMEOUT,
+                 flush_interval=FLUSH_INTERVAL):
+        self.alias = alias
+        self.prefix = prefix
+        self.timeout = timeout
+        self.flush_interval = flush_interval
+        # token -> items (None once deleted) waiting to be written.
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _key(self, token):
+        return f'{self.prefix}:{token}'
+
+    def _claim_key(self, token):
+        return f'{self.prefix}:claim:{token}'
+
+    def new_token(self):
+        return secrets.token_urlsafe(24)
+
+    def get(self, token):
+        items = self.cache.get(self._key(token))
+        if items is None:
+            with self._lock:
+                if token in self._pending:
+                    return dict(self._pending[token] or {})
+            stored = GuestCart.objects.filter(
+                token=token, updated_at__gte=timezone.now() - timedelta(seconds=self.timeout)
+            ).values_list('items', flat=True).first()
+            items = {int(p): q for p, q in (stored or {}).items()}
+            self.cache.set(self._key(token), items, self.timeout if stored else MISSING_CART_TIMEOUT)
+        return items
+
+    def set(self, token, items):
+        self.cache.set(self._key(token), items, self.timeout)
+        self._write_behind(token, items)
+
+    def delete(self, token):
+        # Cached as empty rather than dropped, so other processes do not
+        # read the row back before the flush deletes it.
+        self.cache.set(self._key(token), {}, MISSING_CART_TIMEOUT)
+        self._write_behind(token, None)
+
+    def claim(self, token):
+        """Reserve a cart for merging; False if another request holds it.
+
+        cache.add() is atomic in every backend, so of two logins sent with
+        the same token only one merges the cart.
+        """
+        return self.cache.add(self._claim_key(token), True, CLAIM_TIMEOUT)
+
+    def release(self, token):
+        self.cache.delete(self._claim_key(token))
+
+    def _write_behind(self, token, items):
+        with self._lock:
+            self._pending[token] = items
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._flush_forever, daemon=True)
+                self._flusher.start()
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except DatabaseError:
+                logger.warning("Guest cart flush failed.", exc_info=True)
+            finally:
+                connections.close_all()
+
+    def flush(self):
+        """Write the pending carts to the DB. Returns how many were written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        try:
+            kept = [
+                GuestCart(token=token, items={str(p): q for p, q in items.items()})
+                for token, items in sorted(pending.items()) if items
+            ]
+            if kept:
+                GuestCart.objects.bulk_create(
+                    kept,
+                    update_conflicts=True,
+                    unique_fields=['token'],
+                    update_fields=['items', 'updated_at'],
+                )
+            removed = [token for token, items in pending.items() if not items]
+            if removed:
+                GuestCart.objects.filter(token__in=removed).delete()
+        except DatabaseError:
+            # Retried on the next flush, unless the cart changed meanwhile.
+            with self._lock:
+                self._pending = {**pending, **self._pending}
+            raise
+        return len(pending)
+
+
+guest_carts = GuestCartStore()
+
+
+def merge_guest_cart(user_id, token):
+    """Move a guest cart into the user's cart with one bulk upsert.
+
+    Quantities of products already in the user's cart are added together.
+    Returns the number of lines merged; 0 when another login is merging
+    the same cart.
+    """
+    if not guest_carts.claim(token):
+        return 0
+    try:
+        items = guest_carts.get(token)
+        if not items:
+            return 0
+        with transaction.atomic():
+            merged = add_items(user_id, items)
+            notify_cart_changed(user_id)
+        guest_carts.delete(token)
+    except Exception:
+        # Left for the next login to merge.
+        guest_carts.release(token)
+        raise
+    return len(merged)
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0002_cartitem'),
+        ('products', '0012_brand_counter'),
+    ]
+
+    operations = [
+        # Duplicate lines of the same product are folded into the oldest one.
+        migrations.RunSQL(
+            """
+            WITH merged AS (
+                SELECT MIN(id) AS keep_id, cart_id, product_id, SUM(quantity) AS quantity
+                FROM cart_cartitem
+                GROUP BY cart_id, product_id
+                HAVING COUNT(*) > 1
+            ), kept AS (
+                UPDATE cart_cartitem i SET quantity = merged.quantity
+                FROM merged WHERE i.id = merged.keep_id
+            )
+            DELETE FROM cart_cartitem i
+            USING merged
+            WHERE i.cart_id = merged.cart_id
+              AND i.product_id = merged.product_id
+              AND i.id <> merged.keep_id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(fields=('cart', 'product'), name='cart_item_unique_product'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cart', '0004_guest_cart'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['updated_at'], name='cart_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='guestcart',
+            index=models.Index(fields=['updated_at'], name='guest_cart_updated_idx'),
+        ),
+    ]
@@ -6,6 +6,13 @@ class Cart(models.Model):
         on_delete=models.CASCADE,
         related_name='cart'
     )
+    # Bumped by every cart write; idle carts are purged by purge_stale_data.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], name='cart_updated_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"Cart {self.id} for {self.user.username}"
@@ -23,8 +30,26 @@ class CartItem(models.Model):
     )
     quantity = models.PositiveIntegerField(default=1)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'product'], name='cart_item_unique_product'),
+        ]
+
     def __str__(self) -> str:
         return f"{self.quantity} x {self.product.name} in Cart {self.cart.id} ({self.cart.user.username})"
 
-    
-    
\ No newline at end of file
+
+class GuestCart(models.Model):
+    # Write-behind copy of a guest cart kept in the cache (see cart.guest),
+    # read back only when the cache has lost it.
+    token = models.CharField(max_length=64, unique=True)
+    items = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], name='guest_cart_updated_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f"Guest cart {self.token}"
@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum, Window
+from django.utils import timezone
+
+from combos.engine import apply_combos
+from combos.index import COMBOS_TAG
+from orders.pricing import order_totals
+from products.cache import CATALOG_TAG, product_tag
+from products.models import Product
+from utils.cache import tagged_cache
+from .cache import CART_SUMMARY_TIMEOUT, cart_tag
+from .models import Cart, CartItem
+
+# One statement: find or create the user's cart, then insert the lines or
+# add to them. The product join makes deleted or out-of-stock products
+# insert nothing, and ON CONFLICT makes concurrent adds of the same product
+# sum instead of overwriting each other.
+ADD_USER_ITEMS_SQL = """
+WITH cart AS (
+    INSERT INTO {cart_table} (user_id, updated_at) VALUES (%s, now())
+    ON CONFLICT (user_id) DO UPDATE SET updated_at = EXCLUDED.updated_at
+    RETURNING id
+)
+INSERT INTO {item_table} (cart_id, product_id, quantity)
+SELECT cart.id, p.id, v.quantity
+FROM cart
+CROSS JOIN (VALUES {values}) AS v (product_id, quantity)
+JOIN {product_table} p ON p.id = v.product_id
+WHERE NOT p.is_deleted AND p.is_in_stock
+ORDER BY p.id
+ON CONFLICT (cart_id, product_id) DO UPDATE
+SET quantity = LEAST({item_table}.quantity + EXCLUDED.quantity, {max_quantity})
+RETURNING product_id, quantity
+"""
+
+ADD_ITEMS_SQL = """
+INSERT INTO {table} (cart_id, product_id, quantity) VALUES {values}
+ON CONFLICT (cart_id, product_id) DO UPDATE
+SET quantity = LEAST({table}.quantity + EXCLUDED.quantity, {max_quantity})
+"""
+
+CART_OPERATIONS = ('add', 'set', 'remove')
+MAX_CART_OPERATIONS = 200
+# Per cart line; adding past it caps the line instead of growing it
+# towards the integer column's limit.
+MAX_LINE_QUANTITY = 999
+
+
+class CartOperationError(ValueError):
+    def __init__(self, message, index=None):
+        super().__init__(message)
+        self.message = message
+        self.index = index
+
+    def as_response_data(self):
+        data = {"error": self.message}
+        if self.index is not None:
+            data["index"] = self.index
+        return data
+
+
+def parse_quantity(value, minimum):
+    try:
+        quantity = int(value)
+    except (TypeError, ValueError):
+        raise CartOperationError("quantity must be an integer")
+    if quantity < minimum:
+        raise CartOperationError(f"quantity must be at least {minimum}")
+    if quantity > MAX_LINE_QUANTITY:
+        raise CartOperationError(f"quantity must be at most {MAX_LINE_QUANTITY}")
+    return quantity
+
+
+def fold_operations(operations):
+    """Reduce a list of add/set/remove operations to one change per product.
+
+    Returns ({product_id: quantity to add}, {product_id: quantity to set}),
+    where setting 0 removes the line. Operations on the same product apply
+    in order, so ``set 2, add 1`` sets 3 and ``add 1, remove`` removes.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise CartOperationError("operations must be a non-empty list")
+    if len(operations) > MAX_CART_OPERATIONS:
+        raise CartOperationError(f"At most {MAX_CART_OPERATIONS} operations per request")
+
+    adds = {}
+    sets = {}
+    for index, operation in enumerate(operations):
+        try:
+            if not isinstance(operation, dict) or operation.get('op') not in CART_OPERATIONS:
+                raise CartOperationError(f"op must be one of: {', '.join(CART_OPERATIONS)}")
+            try:
+                product_id = int(operation.get('product_id'))
+            except (TypeError, ValueError):
+                raise CartOperationError("product_id must be an integer")
+
+            op = operation['op']
+            if op == 'add':
+                quantity = parse_quantity(operation.get('quantity', 1), 1)
+                if product_id in sets:
+                    sets[product_id] = min(sets[product_id] + quantity, MAX_LINE_QUANTITY)
+                else:
+                    adds[product_id] = min(adds.get(product_id, 0) + quantity, MAX_LINE_QUANTITY)
+            else:
+                quantity = 0 if op == 'remove' else parse_quantity(operation.get('quantity'), 0)
+                adds.pop(product_id, None)
+                sets[product_id] = quantity
+        except CartOperationError as e:
+            e.index = index
+            raise
+    return adds, sets
+
+
+def unavailable_products(adds, sets):
+    # Products that would be added or set but are missing, deleted or out
+    # of stock; one query.
+    wanted = {p for p, quantity in sets.items() if quantity} | set(adds)
+    available = set(
+        Product.objects
+        .filter(id__in=wanted, is_deleted=False, is_in_stock=True)
+        .values_list('id', flat=True)
+    )
+    return sorted(wanted - available)
+
+
+def apply_operations(cart, adds, sets):
+    """Apply fold_operations() output to a cart with set-based statements.
+
+    Returns the ids of products that cannot be added (missing, deleted or
+    out of stock); nothing is changed in that case. Run it in a
+    transaction so the batch applies as a whole.
+    """
+    unavailable = unavailable_products(adds, sets)
+    if unavailable:
+        return unavailable
+
+    removed = [p for p, quantity in sets.items() if not quantity]
+    if removed:
+        CartItem.objects.filter(cart=cart, product_id__in=removed).delete()
+
+    replaced = sorted((p, quantity) for p, quantity in sets.items() if quantity)
+    if replaced:
+        CartItem.objects.bulk_create(
+            [CartItem(cart=cart, product_id=p, quantity=quantity) for p, quantity in replaced],
+            update_conflicts=True,
+            unique_fields=['cart', 'product'],
+            update_fields=['quantity'],
+        )
+
+    # Sorted, so concurrent batches on the same cart lock lines in order.
+    added = sorted(adds.items())
+    if added:
+        sql = ADD_ITEMS_SQL.format(
+            table=CartItem._meta.db_table,
+            max_quantity=MAX_LINE_QUANTITY,
+            values=', '.join(['(%s, %s, %s)'] * len(added)),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [value for p, quantity in added for value in (cart.id, p, quantity)])
+    return []
+
+
+def add_items(user_id, items):
+    """Add {product_id: quantity} to the user's cart in one round trip.
+
+    Returns {product_id: new quantity} for the lines that were written;
+    missing, deleted and out-of-stock products are left out.
+    """
+    rows = sorted((p, min(quantity, MAX_LINE_QUANTITY)) for p, quantity in items.items())
+    if not rows:
+        return {}
+    sql = ADD_USER_ITEMS_SQL.format(
+        cart_table=Cart._meta.db_table,
+        item_table=CartItem._meta.db_table,
+        product_table=Product._meta.db_table,
+        max_quantity=MAX_LINE_QUANTITY,
+        values=', '.join(['(%s::bigint, %s::integer)'] * len(rows)),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user_id] + [value for row in rows for value in row])
+        return dict(cursor.fetchall())
+
+
+def touch_cart(cart_id):
+    Cart.objects.filter(id=cart_id).update(updated_at=timezone.now())
+
+
+def add_item(user_id, product_id, quantity):
+    """Add ``quantity`` of a product to the user's cart in one round trip.
+
+    Returns the line's new quantity, or None when the product is missing,
+    deleted or out of stock.
+    """
+    return add_items(user_id, {product_id: quantity}).get(product_id)
+
+
+def cart_lines(user_id):
+    # One query: the lines with their totals, and the cart subtotal as a
+    # window over them.
+    line_total = ExpressionWrapper(
+        F('quantity') * F('product__price'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    return list(
+        CartItem.objects
+        .filter(cart__user_id=user_id)
+        .annotate(line_total=line_total, subtotal=Window(Sum(line_total)))
+        .order_by('id')
+        .values(
+            'product_id', 'product__name', 'product__price', 'quantity',
+            'line_total', 'subtotal', 'product__is_in_stock', 'product__is_deleted',
+        )
+    )
+
+
+def build_cart_summary(user_id, total_spent):
+    lines = cart_lines(user_id)
+    subtotal_amount = lines[0]['subtotal'] if lines else Decimal("0.00")
+    _, combos_applied = apply_combos(
+        {line['product_id']: line['quantity'] for line in lines},
+        {line['product_id']: line['product__price'] for line in lines},
+    )
+    return {
+        "items": [
+            {
+                "product_id": line['product_id'],
+                "name": line['product__name'],
+                "price": line['product__price'],
+                "quantity": line['quantity'],
+                "line_total": line['line_total'],
+                "is_in_stock": line['product__is_in_stock'],
+                "is_deleted": line['product__is_deleted'],
+            }
+            for line in lines
+        ],
+        **order_totals(subtotal_amount, combos_applied, total_spent),
+    }
+
+
+def cart_summary(user):
+    """Priced cart, the way CreateOrderView would price it right now.
+
+    Cached per user and rank; cart writes, combo writes and writes to any
+    product in the cart invalidate it. Limited combos are previewed, not
+    redeemed, so checkout can still find one sold out.
+    """
+    product_ids = tagged_cache.get_or_set(
+        ('cart-products', user.id),
+        [cart_tag(user.id)],
+        lambda: list(CartItem.objects.filter(cart__user_id=user.id).values_list('product_id', flat=True)),
+    )
+    tags = [cart_tag(user.id), COMBOS_TAG, CATALOG_TAG] + [product_tag(p) for p in product_ids]
+    return tagged_cache.get_or_set(
+        ('cart-summary', user.id, str(user.total_spent)),
+        tags,
+        lambda: build_cart_summary(user.id, user.total_spent),
+        timeout=CART_SUMMARY_TIMEOUT,
+    )
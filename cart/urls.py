@@ -4,11 +4,17 @@ from .views import (
     ViewCartItems,
     DeleteCartItems,
     UpdateQuantityCartItems,
+    BatchCartItems,
+    CartSummary,
+    GuestCartItems,
 )
 
 urlpatterns = [
     path('', ViewCartItems.as_view(), name='view_cart_items'),
     path('add/', AddCartItem.as_view(), name='add_cart_item'),
+    path('batch/', BatchCartItems.as_view(), name='batch_cart_items'),
+    path('summary/', CartSummary.as_view(), name='cart_summary'),
+    path('guest/', GuestCartItems.as_view(), name='guest_cart_items'),
     path('<int:item_id>/delete/', DeleteCartItems.as_view(), name='delete_cart_item'),
     path('<int:item_id>/update_quantity/', UpdateQuantityCartItems.as_view(), name='update_cart_item'),
 ]
@@ -2,11 +2,18 @@ from __future__ import annotations
 # Create your views here.
 
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from cart.models import Cart, CartItem
 from products.models import Product
+from django.db import transaction
+from .cache import notify_cart_changed
+from .guest import apply_to_items, guest_cart_token, guest_carts
+from .services import (
+    MAX_LINE_QUANTITY, CartOperationError, add_item, apply_operations, cart_summary,
+    fold_operations, touch_cart, unavailable_products,
+)
 
 class AddCartItem(APIView):
     permission_classes = [IsAuthenticated]
@@ -25,52 +32,51 @@ class AddCartItem(APIView):
 
         try:
             quantity = int(quantity)
-            if quantity <= 0:
+            if not 0 < quantity <= MAX_LINE_QUANTITY:
                 raise ValueError
-        except ValueError:
+        except (TypeError, ValueError):
             return Response(
-                {"error": "quantity must be a positive integer"},
+                {"error": f"quantity must be an integer from 1 to {MAX_LINE_QUANTITY}"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Get product
         try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
             return Response(
-                {"error": "Product not found"},
-                status=status.HTTP_404_NOT_FOUND
+                {"error": "product_id must be an integer"},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-        cart, _ = Cart.objects.get_or_create(user=user)
-
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={"quantity": 0}
-        )
-
-        new_quantity = cart_item.quantity + quantity
+        new_quantity = add_item(user.id, product_id, quantity)
+        notify_cart_changed(user.id)
 
-        # Check stock with total quantity
-        if not product.is_in_stock:
+        if new_quantity is None:
+            # Nothing was added; one more query to tell the client why
+            if not Product.objects.filter(id=product_id, is_deleted=False).exists():
+                return Response(
+                    {"error": "Product not found"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
             return Response(
                 {"error": "Requested quantity exceeds available stock"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        cart_item.quantity = new_quantity
-        cart_item.save()
-
         return Response(
             {
                 "message": "Item added to cart successfully",
-                "product_id": product.id,
-                "quantity": cart_item.quantity
+                "product_id": product_id,
+                "quantity": new_quantity
             },
             status=status.HTTP_200_OK
         )
 
+def cart_items_data(cart):
+    items = cart.items.all().order_by('id').values('id','product__id', 'product__name', 'quantity', 'product__price')
+    return list(items)
+
+
 class ViewCartItems(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -81,8 +87,7 @@ class ViewCartItems(APIView):
         except Cart.DoesNotExist:
             return Response({"items": []}, status=status.HTTP_200_OK)
 
-        items = cart.items.all().values('id','product__id', 'product__name', 'quantity', 'product__price')
-        return Response({"items": list(items)}, status=status.HTTP_200_OK)
+        return Response({"items": cart_items_data(cart)}, status=status.HTTP_200_OK)
     
 class DeleteCartItems(APIView):
     permission_classes = [IsAuthenticated]
@@ -93,6 +98,8 @@ class DeleteCartItems(APIView):
             cart = Cart.objects.get(user=user)
             cart_item = CartItem.objects.get(cart=cart, id=item_id)
             cart_item.delete()
+            touch_cart(cart.id)
+            notify_cart_changed(user.id)
             return Response({"message": "Item deleted from cart successfully."}, status=status.HTTP_200_OK)
         except Cart.DoesNotExist:
             return Response({"error": "Cart not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -112,15 +119,104 @@ class UpdateQuantityCartItems(APIView):
             new_quantity = int(new_quantity)
             if new_quantity < 1:
                 return Response({"error": "Quantity must be more than 0."}, status=status.HTTP_400_BAD_REQUEST)
+            if new_quantity > MAX_LINE_QUANTITY:
+                return Response({"error": f"Quantity must be at most {MAX_LINE_QUANTITY}."}, status=status.HTTP_400_BAD_REQUEST)
         
             cart = Cart.objects.get(user=user)
             cart_item = CartItem.objects.get(cart=cart, id=item_id)
             cart_item.quantity = new_quantity
             cart_item.save()
+            touch_cart(cart.id)
+            notify_cart_changed(user.id)
             return Response({"message": "Cart item quantity updated successfully."}, status=status.HTTP_200_OK)
         except Cart.DoesNotExist:
             return Response({"error": "Cart not found."}, status=status.HTTP_404_NOT_FOUND)
         except CartItem.DoesNotExist:
             return Response({"error": "Cart item not found."}, status=status.HTTP_404_NOT_FOUND)
-        
-        
\ No newline at end of file
+
+
+class BatchCartItems(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        user = request.user
+        try:
+            adds, sets = fold_operations(request.data.get("operations"))
+        except CartOperationError as e:
+            return Response(e.as_response_data(), status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            cart, _ = Cart.objects.get_or_create(user=user)
+            unavailable = apply_operations(cart, adds, sets)
+            if not unavailable:
+                touch_cart(cart.id)
+                notify_cart_changed(user.id)
+        if unavailable:
+            return Response(
+                {"error": "Some products are unavailable", "product_ids": unavailable},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({"items": cart_items_data(cart)}, status=status.HTTP_200_OK)
+
+
+class CartSummary(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(cart_summary(request.user), status=status.HTTP_200_OK)
+
+
+class GuestCartItems(APIView):
+    # Carts of signed-out visitors, identified by the X-Cart-Token header
+    # (or a cart_token field) and kept out of the cart tables; merged into
+    # the user's cart on login.
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        token = guest_cart_token(request)
+        items = guest_carts.get(token) if token else {}
+        return Response(
+            {"cart_token": token, "items": guest_items_data(items)},
+            status=status.HTTP_200_OK
+        )
+
+    def post(self, request):
+        try:
+            adds, sets = fold_operations(request.data.get("operations"))
+        except CartOperationError as e:
+            return Response(e.as_response_data(), status=status.HTTP_400_BAD_REQUEST)
+
+        unavailable = unavailable_products(adds, sets)
+        if unavailable:
+            return Response(
+                {"error": "Some products are unavailable", "product_ids": unavailable},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        token = guest_cart_token(request)
+        items = apply_to_items(guest_carts.get(token) if token else {}, adds, sets)
+        token = token or guest_carts.new_token()
+        guest_carts.set(token, items)
+        return Response(
+            {"cart_token": token, "items": guest_items_data(items)},
+            status=status.HTTP_200_OK
+        )
+
+
+def guest_items_data(items):
+    products = {
+        p['id']: p for p in
+        Product.objects.filter(id__in=items).values('id', 'name', 'price')
+    } if items else {}
+    return [
+        {
+            'product__id': product_id,
+            'product__name': products[product_id]['name'],
+            'quantity': quantity,
+            'product__price': products[product_id]['price'],
+        }
+        for product_id, quantity in sorted(items.items())
+        if product_id in products
+    ]
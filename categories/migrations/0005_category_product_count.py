@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0004_category_tree'),
+        ('products', '0012_brand_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='product_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE categories_category c SET product_count = (
+                SELECT COUNT(*) FROM products_product p
+                WHERE p.category_id = c.id AND NOT p.is_deleted
+            )
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
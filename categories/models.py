@@ -1,16 +1,93 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Exists, F, OuterRef, Value
+from django.db.models.functions import Concat, Substr
+from django.db.models.lookups import StartsWith
 from django.utils import timezone
 
+# Materialized path: the zero-padded ids from the root down to the node, each
+# followed by '/'. A subtree is every row whose path starts with the node's.
+PATH_SEGMENT_WIDTH = 10
+
+
+def path_segment(category_id):
+    return f'{category_id:0{PATH_SEGMENT_WIDTH}d}/'
+
+
+def path_ids(path):
+    return [int(segment) for segment in path.split('/') if segment]
 
 
 class Category(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True)
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='children'
+    )
+    path = models.CharField(max_length=255, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(editable=False, default=0)
+    # Live products directly in this category (not its subcategories);
+    # maintained by products.counters.
+    product_count = models.IntegerField(editable=False, default=0)
     
     
 
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Prefix (LIKE 'path%') lookups for subtrees, whatever the collation.
+            models.Index(fields=['path'], name='category_path_idx', opclasses=['varchar_pattern_ops']),
+        ]
+
     def __str__(self) -> str:
         return self.name
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self.update_path()
+
+    def update_path(self):
+        parent_path = ''
+        if self.parent_id:
+            parent_path = Category.objects.values_list('path', flat=True).get(id=self.parent_id)
+        if self.path and parent_path.startswith(self.path):
+            raise ValueError("A category cannot be moved under its own subtree")
+        path = parent_path + path_segment(self.id)
+        if path == self.path:
+            return
+
+        old_path, depth = self.path, len(path_ids(path)) - 1
+        if old_path:
+            # Move the whole subtree in one statement.
+            Category.objects.filter(path__startswith=old_path).update(
+                path=Concat(Value(path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (depth - self.depth),
+            )
+        else:
+            Category.objects.filter(id=self.id).update(path=path, depth=depth)
+        self.path, self.depth = path, depth
+
+    def subtree(self):
+        return Category.objects.filter(path__startswith=self.path)
+
+
+def subtrees(names):
+    """Categories called any of ``names``, with all their descendants."""
+    roots = Category.objects.filter(
+        StartsWith(OuterRef('path'), F('path')), name__in=names
+    )
+    return Category.objects.filter(Exists(roots))
+
+
+def ancestors(category_ids):
+    """Categories with any of ``category_ids`` in their subtree, themselves included."""
+    nodes = Category.objects.filter(
+        StartsWith(F('path'), OuterRef('path')), id__in=category_ids
+    )
+    return Category.objects.filter(Exists(nodes))
@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from products.cache import CATALOG_TAG, CATEGORIES_TAG
+from utils.cache import tagged_cache
+from .models import Category
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    # Renames and moves change which products a category filter matches, so
+    # every cached catalog entry goes along with the category list. Wait for
+    # the commit: a move rewrites the subtree's paths after this signal.
+    transaction.on_commit(
+        lambda: tagged_cache.invalidate_tags([CATEGORIES_TAG, CATALOG_TAG])
+    )
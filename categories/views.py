@@ -2,11 +2,38 @@ from django.shortcuts import render
 
 # Create your views here.
 from rest_framework.views import APIView
-from rest_framework.response import Response
-from rest_framework import status
+from products.cache import CATALOG_TAG, CATEGORIES_TAG, PRODUCT_LIST_TAG
+from utils.http import cached_response
 from .models import Category
 
 class CategoryListView(APIView):
     def get(self, request):
-        categories = Category.objects.all().values('id', 'name', 'description', 'created_at', 'updated_at')
-        return Response(categories, status= status.HTTP_200_OK)
\ No newline at end of file
+        # Product counts move with every product write, hence the product tags.
+        tags = [CATEGORIES_TAG, CATALOG_TAG, PRODUCT_LIST_TAG]
+        return cached_response(request, ('categories',), tags, self.build_categories)
+
+    def build_categories(self):
+        categories = Category.objects.order_by('path').values(
+            'id', 'name', 'description', 'parent_id', 'depth',
+            'product_count', 'created_at', 'updated_at',
+        )
+        return build_tree(categories)
+
+
+def build_tree(categories):
+    # Rows come ordered by path, so every parent precedes its children.
+    nodes = {}
+    roots = []
+    for category in categories:
+        node = {**category, 'children': []}
+        nodes[node['id']] = node
+        parent = nodes.get(node['parent_id'])
+        (parent['children'] if parent else roots).append(node)
+
+    # product_count covers the whole subtree; children are summed into
+    # their parents deepest first.
+    for node in reversed(list(nodes.values())):
+        parent = nodes.get(node['parent_id'])
+        if parent:
+            parent['product_count'] += node['product_count']
+    return roots
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CombosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'combos'
+
+    def ready(self):
+        import combos.signal
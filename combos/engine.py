@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from .index import combo_index
+from .redemptions import remaining_redemptions
+
+# Branch-and-bound nodes explored per group of overlapping combos before
+# settling for the best assignment found so far (the first one tried is
+# the greedy one, so the result is never worse than greedy).
+MAX_SEARCH_NODES = 20_000
+
+
+class ComboApplication:
+    def __init__(self, rule, times, unit_savings):
+        self.rule = rule
+        self.times = times
+        self.unit_savings = unit_savings
+        self.savings = unit_savings * times
+
+    def limited_to(self, times):
+        return ComboApplication(self.rule, min(times, self.times), self.unit_savings)
+
+    def as_dict(self):
+        return {
+            'combo_id': self.rule.id,
+            'name': self.rule.name,
+            'times': self.times,
+            'combo_price': self.rule.price,
+            'savings': self.savings,
+        }
+
+
+def combo_savings(rule, prices):
+    return sum((prices[p] * q for p, q in rule.items), Decimal('0')) - rule.price
+
+
+def apply_combos(quantities, prices, index=None, now=None, limits=None):
+    """Pick the non-overlapping combo applications that save the most.
+
+    ``quantities`` and ``prices`` map product ids to the cart quantity and
+    unit price. ``limits`` maps limited combos to the redemptions left and
+    is read from the redemption shards when not given. Returns (total
+    savings, [ComboApplication]).
+    """
+    index = index or combo_index.get()
+    options = []
+    for rule in index.candidates(quantities, now):
+        savings = combo_savings(rule, prices)
+        if savings > 0:
+            options.append((rule, savings))
+    if limits is None:
+        limits = remaining_redemptions([rule.id for rule, _ in options])
+
+    applications = []
+    for group in overlapping_groups(options):
+        applications.extend(best_assignment(group, quantities, limits))
+
+    total = sum((a.savings for a in applications), Decimal('0'))
+    return total, applications
+
+
+def overlapping_groups(options):
+    # Combos that share no product can be decided independently; union-find
+    # over the products splits the search into those groups.
+    parent = {}
+
+    def find(x):
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for rule, _ in options:
+        first = rule.items[0][0]
+        for product_id, _ in rule.items[1:]:
+            parent[find(product_id)] = find(first)
+
+    groups = {}
+    for option in options:
+        groups.setdefault(find(option[0].items[0][0]), []).append(option)
+    return list(groups.values())
+
+
+def best_assignment(options, quantities, limits=None):
+    """Integer program over one group: choose how many times to apply each
+    combo, maximising savings, within the cart quantities, each combo's
+    max_apply_quantity and the redemptions left in ``limits``. Solved by
+    depth-first branch and bound."""
+    limits = limits or {}
+    options = sorted(options, key=lambda o: o[1], reverse=True)
+    stock = {p: quantities[p] for rule, _ in options for p, _ in rule.items}
+    times = [0] * len(options)
+    best = {'value': Decimal('0'), 'times': list(times)}
+    nodes = 0
+
+    def capacity(i):
+        rule = options[i][0]
+        fits = min(stock[p] // q for p, q in rule.items)
+        if rule.max_apply_quantity is not None:
+            fits = min(fits, rule.max_apply_quantity)
+        if rule.id in limits:
+            fits = min(fits, limits[rule.id])
+        return fits
+
+    def search(i, value):
+        nonlocal nodes
+        nodes += 1
+        if value > best['value']:
+            best['value'], best['times'] = value, list(times)
+        if i == len(options) or nodes > MAX_SEARCH_NODES:
+            return
+        # Optimistic bound: every remaining combo as often as the current
+        # stock allows, ignoring that they compete for it.
+        bound = value + sum(options[j][1] * capacity(j) for j in range(i, len(options)))
+        if bound <= best['value']:
+            return
+
+        rule, savings = options[i]
+        for count in range(capacity(i), -1, -1):
+            for p, q in rule.items:
+                stock[p] -= q * count
+            times[i] = count
+            search(i + 1, value + savings * count)
+            times[i] = 0
+            for p, q in rule.items:
+                stock[p] += q * count
+
+    search(0, Decimal('0'))
+    return [
+        ComboApplication(rule, count, savings)
+        for (rule, savings), count in zip(options, best['times'])
+        if count
+    ]
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+from datetime import timedelta
+from typing import NamedTuple
+
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from utils.cache import tagged_cache
+from .models import Combo, ComboItem
+
+# Bumped on every combo write (see combos.signal); indexes built under an
+# older version catch up on their next use, in every process.
+COMBOS_TAG = 'combos'
+# Combos are re-read from a little before the newest updated_at already
+# indexed, so writes that committed late with an older timestamp are kept.
+REFRESH_OVERLAP = timedelta(seconds=30)
+
+
+class ComboRule(NamedTuple):
+    id: int
+    name: str
+    price: object  # Decimal
+    # ((product_id, quantity), ...) sorted by product id
+    items: tuple
+    max_apply_quantity: int | None
+    start_at: object
+    end_at: object
+
+    def is_live(self, now):
+        return (
+            (self.start_at is None or self.start_at <= now)
+            and (self.end_at is None or now < self.end_at)
+        )
+
+    def next_boundary(self, now):
+        # The next instant is_live() changes, or None if it never will again.
+        if self.start_at is not None and now < self.start_at:
+            return self.start_at
+        if self.end_at is not None and now < self.end_at:
+            return self.end_at
+        return None
+
+
+def schedulable_combos(now):
+    # Active auto-apply combos that are live now or will be later.
+    return Combo.objects.filter(
+        Q(end_at__isnull=True) | Q(end_at__gt=now),
+        is_active=True,
+        is_auto_apply=True,
+    )
+
+
+def load_rules(combos):
+    items = {}
+    for combo_id, product_id, quantity in (
+        ComboItem.objects
+        .filter(combo__in=combos, quantity__gt=0)
+        .values_list('combo_id', 'product_id', 'quantity')
+    ):
+        items.setdefault(combo_id, []).append((product_id, quantity))
+
+    return [
+        ComboRule(
+            id=combo.id,
+            name=combo.name,
+            price=combo.combo_price,
+            items=tuple(sorted(items[combo.id])),
+            max_apply_quantity=combo.max_apply_quantity,
+            start_at=combo.start_at,
+            end_at=combo.end_at,
+        )
+        for combo in combos.only(
+            'id', 'name', 'combo_price', 'max_apply_quantity', 'start_at', 'end_at'
+        )
+        if combo.id in items
+    ]
+
+
+class ComboIndex:
+    """Active auto-apply combos, keyed by the products they contain.
+
+    Combos whose window has not opened yet are indexed too. A heap of
+    window boundaries switches them on and off: every lookup first pops
+    the boundaries that have passed, so no timer thread or DB polling is
+    needed and a lookup only touches the cart's products.
+    """
+
+    def __init__(self, rules=(), version=None, now=None):
+        self.rules = {}
+        self.live_by_product = {}
+        self.version = version
+        self.high_water = None
+        self._events = []
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+        now = now or timezone.now()
+        for rule in rules:
+            self.add(rule, now)
+
+    def __len__(self):
+        return len(self.rules)
+
+    @classmethod
+    def load(cls, version=None, now=None):
+        now = now or timezone.now()
+        combos = schedulable_combos(now)
+        index = cls(load_rules(combos), version, now)
+        index.high_water = combos.aggregate(Max('updated_at'))['updated_at__max']
+        return index
+
+    def refresh(self, version, now=None):
+        """Catch up with combo writes: drop combos that were deleted,
+        deactivated or have ended, and re-read those updated since the
+        last refresh."""
+        now = now or timezone.now()
+        combos = schedulable_combos(now)
+        with self._lock:
+            current = set(combos.values_list('id', flat=True))
+            for combo_id in set(self.rules) - current:
+                self.remove(combo_id)
+
+            changed = Q(id__in=current - set(self.rules))
+            if self.high_water is not None:
+                changed |= Q(updated_at__gte=self.high_water - REFRESH_OVERLAP)
+            changed = combos.filter(changed)
+            for combo_id in changed.values_list('id', flat=True):
+                self.remove(combo_id)
+            for rule in load_rules(changed):
+                self.add(rule, now)
+
+            high_water = combos.aggregate(Max('updated_at'))['updated_at__max']
+            if high_water is not None:
+                self.high_water = max(high_water, self.high_water or high_water)
+            self.version = version
+
+    def add(self, rule, now):
+        with self._lock:
+            self.remove(rule.id)
+            boundary = rule.next_boundary(now)
+            if boundary is None and not rule.is_live(now):
+                return
+            self.rules[rule.id] = rule
+            if rule.is_live(now):
+                self._activate(rule)
+            if boundary is not None:
+                heapq.heappush(self._events, (boundary, next(self._seq), rule))
+
+    def remove(self, combo_id):
+        with self._lock:
+            rule = self.rules.pop(combo_id, None)
+            if rule is not None:
+                self._deactivate(rule)
+            # Its pending boundaries stay in the heap and are skipped when
+            # popped, since the rule is no longer (this version) indexed.
+
+    def advance(self, now):
+        with self._lock:
+            while self._events and self._events[0][0] <= now:
+                _, _, rule = heapq.heappop(self._events)
+                if self.rules.get(rule.id) is not rule:
+                    continue
+                if rule.is_live(now):
+                    self._activate(rule)
+                else:
+                    self._deactivate(rule)
+                boundary = rule.next_boundary(now)
+                if boundary is None:
+                    if not rule.is_live(now):
+                        del self.rules[rule.id]
+                else:
+                    heapq.heappush(self._events, (boundary, next(self._seq), rule))
+
+    def _activate(self, rule):
+        for product_id, _ in rule.items:
+            self.live_by_product.setdefault(product_id, set()).add(rule.id)
+
+    def _deactivate(self, rule):
+        for product_id, _ in rule.items:
+            live = self.live_by_product.get(product_id)
+            if live is not None:
+                live.discard(rule.id)
+                if not live:
+                    del self.live_by_product[product_id]
+
+    def candidates(self, quantities, now=None):
+        """Live rules whose every item is in ``quantities`` ({product_id: qty})
+        in at least the combo's quantity."""
+        with self._lock:
+            self.advance(now or timezone.now())
+            combo_ids = set()
+            for product_id in quantities:
+                combo_ids.update(self.live_by_product.get(product_id, ()))
+            rules = [self.rules[combo_id] for combo_id in combo_ids]
+        return sorted(
+            (
+                rule for rule in rules
+                if all(quantities.get(p, 0) >= q for p, q in rule.items)
+            ),
+            key=lambda rule: rule.id,
+        )
+
+
+class ComboIndexCache:
+    def __init__(self, cache=tagged_cache):
+        self.cache = cache
+        self.index = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        [version] = self.cache.tag_versions([COMBOS_TAG])
+        index = self.index
+        if index is not None and index.version == version:
+            return index
+        with self._lock:
+            if self.index is None:
+                self.index = ComboIndex.load(version)
+            elif self.index.version != version:
+                self.index.refresh(version)
+            return self.index
+
+    def invalidate(self):
+        self.cache.invalidate_tags([COMBOS_TAG])
+
+
+combo_index = ComboIndexCache()
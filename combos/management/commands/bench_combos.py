@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import random
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from combos.engine import apply_combos
+from combos.index import ComboIndex
+from combos.models import Combo, ComboItem
+from products.benchmarking import seed_products, time_call
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed products and auto-apply combos, then time combo pricing for "
+        "random carts. Everything seeded is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=5000)
+        parser.add_argument('--combos', type=int, default=5000)
+        parser.add_argument('--lines', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        rng = random.Random(221)
+        with transaction.atomic():
+            seed_products(options['products'])
+            products = list(
+                Product.objects.filter(is_deleted=False)
+                .order_by('-id')
+                .values_list('id', 'price')[:options['products']]
+            )
+            self.seed_combos(rng, products, options['combos'])
+
+            index = ComboIndex.load()
+            self.stdout.write(f"Indexed {len(index)} combos over {len(index.live_by_product)} products")
+
+            carts = []
+            for _ in range(options['repeat']):
+                lines = rng.sample(products, options['lines'])
+                carts.append((
+                    {product_id: rng.randint(1, 4) for product_id, _ in lines},
+                    dict(lines),
+                ))
+
+            results = iter(carts * 2)
+
+            def price_cart():
+                quantities, prices = next(results)
+                return apply_combos(quantities, prices, index=index)
+
+            timings = time_call(price_cart, options['repeat'])
+            savings = [apply_combos(q, p, index=index)[0] for q, p in carts]
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"{options['lines']}-line carts: p50={timings['p50_ms']}ms "
+            f"p99={timings['p99_ms']}ms, {sum(1 for s in savings if s)} of "
+            f"{len(carts)} carts got a combo"
+        )
+
+    def seed_combos(self, rng, products, count):
+        combos = Combo.objects.bulk_create([
+            Combo(
+                name=f'Bench combo {i}',
+                combo_price=Decimal('0'),
+                is_auto_apply=True,
+                max_apply_quantity=rng.choice([None, 1, 2]),
+            )
+            for i in range(count)
+        ])
+        items = []
+        for combo in combos:
+            picked = rng.sample(products, rng.randint(2, 3))
+            for product_id, price in picked:
+                items.append(ComboItem(combo=combo, product_id=product_id, quantity=rng.randint(1, 2)))
+            combo.combo_price = sum(price for _, price in picked) * Decimal('0.9')
+        ComboItem.objects.bulk_create(items)
+        Combo.objects.bulk_update(combos, ['combo_price'])
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import Counter
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from accounts.models import User
+from cart.models import Cart, CartItem
+from categories.models import Category
+from combos.models import Combo, ComboItem, ComboRedemption, ComboRedemptionShard
+from orders.models import Order
+from orders.views import AdminUpdateOrderStatusView, CreateOrderView
+from products.models import Product
+
+CHECKOUT = {
+    'customer_name': 'Stress buyer',
+    'customer_phone': '0900000000',
+    'customer_address': 'Stress street',
+    'payment_method': 'cod',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Check out many carts concurrently against a combo with a redemption "
+        "limit, cancel some of the orders, and verify the combo was never "
+        "redeemed more than its limit. Everything created is deleted. The "
+        "command writes to the configured database, so it only runs with "
+        "DEBUG on or --i-know-this-writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buyers', type=int, default=400)
+        parser.add_argument('--threads', type=int, default=32)
+        parser.add_argument('--limit', type=int, default=150)
+        parser.add_argument('--max-per-order', type=int, default=3)
+        parser.add_argument(
+            '--i-know-this-writes', action='store_true',
+            help="Run against a database even though DEBUG is off.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['i_know_this_writes']:
+            raise CommandError(
+                "This creates and deletes users, products and orders in the configured "
+                "database. Run it with DEBUG on, or pass --i-know-this-writes."
+            )
+        rng = random.Random(221)
+        category = Category.objects.order_by('id').first()
+        if category is None:
+            raise CommandError("Create a category first.")
+
+        products = [
+            Product.objects.create(
+                name=f'Stress product {i}', price=Decimal('100000'),
+                category=category, brand='Stress',
+            )
+            for i in range(2)
+        ]
+        combo = Combo.objects.create(
+            name='Stress combo', combo_price=Decimal('150000'),
+            is_auto_apply=True, redemption_limit=options['limit'],
+        )
+        for product in products:
+            ComboItem.objects.create(combo=combo, product=product)
+        admin = User.objects.create(username='stress-admin', is_staff=True)
+        buyers = [
+            User.objects.create(username=f'stress-buyer-{i}', email=f'stress-buyer-{i}@example.com')
+            for i in range(options['buyers'])
+        ]
+        carts = {cart.user_id: cart for cart in Cart.objects.bulk_create([Cart(user=b) for b in buyers])}
+        # Each order redeems the combo once per unit of its (equal) lines.
+        demand = 0
+        for buyer in buyers:
+            quantity = rng.randint(1, options['max_per_order'])
+            demand += quantity
+            CartItem.objects.bulk_create([
+                CartItem(cart=carts[buyer.id], product=product, quantity=quantity)
+                for product in products
+            ])
+
+        try:
+            with override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'):
+                self.stress(combo, buyers, admin, demand, options, rng)
+        finally:
+            User.objects.filter(id__in=[admin.id] + [b.id for b in buyers]).delete()
+            combo.delete()
+            Product.objects.filter(id__in=[p.id for p in products]).delete()
+
+    def stress(self, combo, buyers, admin, demand, options, rng):
+        factory = APIRequestFactory()
+        statuses = Counter()
+        failures = []
+        queue = list(buyers)
+        lock = threading.Lock()
+
+        def checkout():
+            try:
+                while True:
+                    with lock:
+                        if not queue:
+                            return
+                        buyer = queue.pop()
+                    request = factory.post('/api/orders/create/', CHECKOUT, format='json')
+                    force_authenticate(request, user=buyer)
+                    response = CreateOrderView.as_view()(request)
+                    with lock:
+                        statuses[response.status_code] += 1
+            except Exception as e:
+                # Without this the thread dies quietly and its remaining
+                # buyers are never checked out.
+                with lock:
+                    failures.append(repr(e))
+            finally:
+                connection.close()
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=checkout) for _ in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{len(buyers)} checkouts on {options['threads']} threads in {elapsed:.2f}s: "
+            f"{dict(statuses)}"
+        )
+        if failures:
+            raise CommandError(f"{len(failures)} checkout threads raised: {failures[:5]}")
+        unexpected = {code: n for code, n in statuses.items() if code not in (201, 400)}
+        if unexpected or sum(statuses.values()) != len(buyers):
+            raise CommandError(f"Checkouts did not all complete with 201 or 400: {dict(statuses)}")
+        # Demand exceeds the limit by default, so the combo must sell out
+        # exactly: fewer redemptions mean checkouts lost the race wrongly.
+        redeemed = self.verify(combo, options['limit'])
+        if redeemed != min(demand, options['limit']):
+            raise CommandError(
+                f"Expected {min(demand, options['limit'])} redemptions for a demand of "
+                f"{demand}, got {redeemed}."
+            )
+        # Buyers start at the lowest rank (no bonus), so every order's discount
+        # is exactly the combo savings for the redemptions it recorded.
+        savings = sum(
+            item.product.price * item.quantity for item in combo.items.select_related('product')
+        ) - combo.combo_price
+        for order in Order.objects.filter(user__in=buyers).annotate(redeemed=Sum('combo_redemptions__quantity')):
+            if order.discount_amount != savings * (order.redeemed or 0):
+                raise CommandError(f"Order {order.id} was discounted for redemptions it did not get.")
+
+        orders = list(Order.objects.filter(combo_redemptions__combo=combo).distinct())
+        cancelled = rng.sample(orders, len(orders) // 2)
+        for order in cancelled:
+            request = factory.put(f'/api/orders/admin/{order.id}/update_status/', {'new_status': 'cancelled'}, format='json')
+            force_authenticate(request, user=admin)
+            response = AdminUpdateOrderStatusView.as_view()(request, order_id=order.id)
+            if response.status_code != 200:
+                raise CommandError(f"Cancelling order {order.id} failed: {response.data}")
+        self.stdout.write(f"Cancelled {len(cancelled)} orders that used the combo")
+        self.verify(combo, options['limit'])
+
+    def verify(self, combo, limit):
+        redeemed = ComboRedemption.objects.filter(combo=combo).aggregate(total=Sum('quantity'))['total'] or 0
+        shards = list(ComboRedemptionShard.objects.filter(combo=combo).values_list('remaining', flat=True))
+        remaining = sum(shards)
+        self.stdout.write(f"  redeemed={redeemed} remaining={remaining} limit={limit} shards={shards}")
+        if redeemed > limit or redeemed + remaining != limit or min(shards) < 0:
+            raise CommandError("Redemption counters are inconsistent: the combo was oversold.")
+        return redeemed
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('combos', '0001_initial'),
+        ('orders', '0004_remove_order_bonus_percent_order_subtotal_amount_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='combo',
+            name='redemption_limit',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='ComboRedemption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('quantity', models.PositiveIntegerField()),
+                ('combo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='redemptions', to='combos.combo')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='combo_redemptions', to='orders.order')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ComboRedemptionShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField()),
+                ('remaining', models.PositiveIntegerField()),
+                ('combo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='redemption_shards', to='combos.combo')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('combo', 'shard'), name='combo_redemption_shard_unique')],
+            },
+        ),
+    ]
@@ -11,6 +11,8 @@ class Combo(models.Model):
     is_active = models.BooleanField(default=True)
 
     max_apply_quantity = models.PositiveIntegerField(null=True, blank=True)
+    # Total applications across all orders; null means unlimited.
+    redemption_limit = models.PositiveIntegerField(null=True, blank=True)
 
     start_at = models.DateTimeField(null=True, blank=True)
     end_at = models.DateTimeField(null=True, blank=True)
@@ -39,3 +41,35 @@ class ComboItem(models.Model):
 
     def __str__(self):
         return f"{self.combo.name} - {self.product.name} x {self.quantity}"
+
+
+class ComboRedemptionShard(models.Model):
+    # A limited combo's remaining redemptions, split over a few rows so
+    # concurrent checkouts decrement different rows.
+    combo = models.ForeignKey(
+        Combo,
+        on_delete=models.CASCADE,
+        related_name='redemption_shards'
+    )
+    shard = models.PositiveSmallIntegerField()
+    remaining = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['combo', 'shard'], name='combo_redemption_shard_unique'),
+        ]
+
+
+class ComboRedemption(models.Model):
+    order = models.ForeignKey(
+        'orders.Order',
+        on_delete=models.CASCADE,
+        related_name='combo_redemptions'
+    )
+    combo = models.ForeignKey(
+        Combo,
+        on_delete=models.CASCADE,
+        related_name='redemptions'
+    )
+    shard = models.PositiveSmallIntegerField()
+    quantity = models.PositiveIntegerField()
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import random
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import ComboRedemption, ComboRedemptionShard
+
+# Rows a limited combo's remaining redemptions are spread over. Each
+# checkout starts at a random shard, so concurrent checkouts mostly
+# update (and briefly lock) different rows.
+REDEMPTION_SHARDS = 8
+# Passes over the shards that looked able to cover a checkout before it
+# falls back to collecting the redemptions across shards.
+MAX_REDEEM_ROUNDS = 4
+
+
+def split_evenly(total, parts):
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def remaining_redemptions(combo_ids):
+    """{combo_id: redemptions left} for the limited combos among ``combo_ids``.
+
+    Unlocked read, used to price an order; redeem() is what enforces the
+    limit.
+    """
+    if not combo_ids:
+        return {}
+    return dict(
+        ComboRedemptionShard.objects
+        .filter(combo_id__in=combo_ids)
+        .values('combo_id')
+        .annotate(left=Sum('remaining'))
+        .values_list('combo_id', 'left')
+    )
+
+
+def redeem(combo_id, quantity, rng=random):
+    """Take up to ``quantity`` redemptions of a limited combo.
+
+    Returns [(shard, taken)]; call it inside the checkout transaction so a
+    rollback gives the redemptions back.
+    """
+    for _ in range(MAX_REDEEM_ROUNDS):
+        shards = list(
+            ComboRedemptionShard.objects
+            .filter(combo_id=combo_id, remaining__gte=quantity)
+            .values_list('shard', flat=True)
+        )
+        if not shards:
+            break
+        rng.shuffle(shards)
+        for shard in shards:
+            # Conditional decrement: no shard goes below zero whatever the
+            # concurrency. An UPDATE that waited on a row and then found it
+            # no longer matches still keeps it locked, so a miss is rolled
+            # back to drop that lock before trying elsewhere.
+            savepoint = transaction.savepoint()
+            if (
+                ComboRedemptionShard.objects
+                .filter(combo_id=combo_id, shard=shard, remaining__gte=quantity)
+                .update(remaining=F('remaining') - quantity)
+            ):
+                transaction.savepoint_commit(savepoint)
+                return [(shard, quantity)]
+            transaction.savepoint_rollback(savepoint)
+
+    # No single shard has enough left: near the end of a sale the remainder
+    # is collected across shards, locked in shard order so two checkouts
+    # doing this cannot deadlock.
+    taken = []
+    needed = quantity
+    for shard in (
+        ComboRedemptionShard.objects.select_for_update()
+        .filter(combo_id=combo_id, remaining__gt=0)
+        .order_by('shard')
+    ):
+        take = min(needed, shard.remaining)
+        ComboRedemptionShard.objects.filter(id=shard.id).update(remaining=F('remaining') - take)
+        taken.append((shard.shard, take))
+        needed -= take
+        if not needed:
+            break
+    return taken
+
+
+def redeem_combos(applications):
+    """Redeem the limited combos among ``applications``.
+
+    Returns the applications trimmed to what could be redeemed (a combo can
+    run out between pricing and checkout) and the unsaved ComboRedemption
+    rows to record once the order exists.
+    """
+    limited = set(
+        ComboRedemptionShard.objects
+        .filter(combo_id__in=[a.rule.id for a in applications])
+        .values_list('combo_id', flat=True)
+    ) if applications else set()
+    granted = []
+    redemptions = []
+    # Combos in id order, so checkouts redeeming several limited combos
+    # lock their shards in the same order.
+    for application in sorted(applications, key=lambda a: a.rule.id):
+        combo_id = application.rule.id
+        if combo_id not in limited:
+            granted.append(application)
+            continue
+        taken = redeem(combo_id, application.times)
+        redemptions.extend(
+            ComboRedemption(combo_id=combo_id, shard=shard, quantity=quantity)
+            for shard, quantity in taken
+        )
+        times = sum(quantity for _, quantity in taken)
+        if times:
+            granted.append(application.limited_to(times))
+    return granted, redemptions
+
+
+def record_redemptions(order, redemptions):
+    for redemption in redemptions:
+        redemption.order = order
+    ComboRedemption.objects.bulk_create(redemptions)
+
+
+def release_redemptions(order):
+    """Give an order's redemptions back to their shards, e.g. on cancel.
+
+    The rows are deleted as they are released, so releasing twice is a
+    no-op. Callers hold a lock on the order.
+    """
+    redemptions = list(ComboRedemption.objects.filter(order=order).order_by('combo_id', 'shard'))
+    for redemption in redemptions:
+        ComboRedemptionShard.objects.filter(
+            combo_id=redemption.combo_id, shard=redemption.shard
+        ).update(remaining=F('remaining') + redemption.quantity)
+    ComboRedemption.objects.filter(id__in=[r.id for r in redemptions]).delete()
+
+
+@transaction.atomic
+def sync_redemption_shards(combo, shards=REDEMPTION_SHARDS):
+    """Make the combo's shards hold ``redemption_limit`` minus what has
+    been redeemed, or drop them when the combo is unlimited."""
+    # Locking the shards waits for checkouts that already took from them,
+    # so their redemptions are counted below.
+    current = list(
+        ComboRedemptionShard.objects.select_for_update()
+        .filter(combo=combo)
+        .order_by('shard')
+    )
+    if combo.redemption_limit is None:
+        if current:
+            ComboRedemptionShard.objects.filter(combo=combo).delete()
+        return
+
+    redeemed = (
+        ComboRedemption.objects.filter(combo=combo)
+        .aggregate(total=Sum('quantity'))['total'] or 0
+    )
+    remaining = max(combo.redemption_limit - redeemed, 0)
+    if current and sum(s.remaining for s in current) == remaining:
+        return
+
+    ComboRedemptionShard.objects.filter(combo=combo).delete()
+    ComboRedemptionShard.objects.bulk_create([
+        ComboRedemptionShard(combo=combo, shard=shard, remaining=count)
+        for shard, count in enumerate(split_evenly(remaining, shards))
+    ])
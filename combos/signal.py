@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .index import combo_index
+from .models import Combo, ComboItem
+from .redemptions import sync_redemption_shards
+
+@receiver([post_save, post_delete], sender=ComboItem)
+def touch_combo(sender, instance, **kwargs):
+    # The index re-reads combos by updated_at; an item change counts as a
+    # change of its combo.
+    Combo.objects.filter(id=instance.combo_id).update(updated_at=timezone.now())
+    transaction.on_commit(combo_index.invalidate)
+
+@receiver([post_save, post_delete], sender=Combo)
+def invalidate_combo_index(sender, instance, **kwargs):
+    transaction.on_commit(combo_index.invalidate)
+
+@receiver(post_save, sender=Combo)
+def sync_redemption_limit(sender, instance, **kwargs):
+    sync_redemption_shards(instance)
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import ComboListView, ComboDetailView
+
+urlpatterns = [
+    path('', ComboListView.as_view(), name='combo_list'),
+    path('<int:combo_id>/', ComboDetailView.as_view(), name='combo_detail'),
+]
@@ -1,3 +1,105 @@
 from django.shortcuts import render
 
 # Create your views here.
+from decimal import Decimal
+
+from django.db.models import Prefetch, Q
+from django.utils import timezone
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+
+from products.cache import CATALOG_TAG, PRODUCT_LIST_TAG
+from utils.cache import tagged_cache
+from utils.http import compute_etag, etag_response
+from .index import COMBOS_TAG
+from .models import Combo, ComboItem
+
+# Product writes (prices, deletes) bump PRODUCT_LIST_TAG, combo writes
+# COMBOS_TAG.
+COMBO_CACHE_TAGS = [COMBOS_TAG, CATALOG_TAG, PRODUCT_LIST_TAG]
+
+
+def combos_with_items(combos):
+    # Two queries whatever the number of combos: the combos, then all their
+    # items joined to their products.
+    return combos.prefetch_related(
+        Prefetch(
+            'items',
+            queryset=ComboItem.objects.select_related('product').order_by('id'),
+        )
+    )
+
+
+def unexpired_combos(now):
+    return Combo.objects.filter(
+        Q(end_at__isnull=True) | Q(end_at__gt=now),
+        is_active=True,
+    ).order_by('-created_at', '-id')
+
+
+def build_combo_data(combo):
+    items = [
+        {
+            'product_id': item.product_id,
+            'name': item.product.name,
+            'image_url': item.product.image_url,
+            'price': item.product.price,
+            'quantity': item.quantity,
+            'is_deleted': item.product.is_deleted,
+        }
+        for item in combo.items.all()
+    ]
+    original_price = sum((i['price'] * i['quantity'] for i in items), Decimal('0'))
+    return {
+        'id': combo.id,
+        'name': combo.name,
+        'description': combo.description,
+        'combo_price': combo.combo_price,
+        'original_price': original_price,
+        'savings': original_price - combo.combo_price,
+        'is_auto_apply': combo.is_auto_apply,
+        'max_apply_quantity': combo.max_apply_quantity,
+        'start_at': combo.start_at,
+        'end_at': combo.end_at,
+        'items': items,
+    }
+
+
+def is_available(combo, now):
+    # Window checked per request, so cached combos open and close on time.
+    return (
+        bool(combo['items'])
+        and (combo['start_at'] is None or combo['start_at'] <= now)
+        and (combo['end_at'] is None or now < combo['end_at'])
+        and not any(item['is_deleted'] for item in combo['items'])
+    )
+
+
+class ComboListView(APIView):
+    def get(self, request):
+        combos = tagged_cache.get_or_set(('combo-list',), COMBO_CACHE_TAGS, self.build_combos)
+        now = timezone.now()
+        data = {"combos": [c for c in combos if is_available(c, now)]}
+        return etag_response(request, data, compute_etag(data))
+
+    def build_combos(self):
+        combos = combos_with_items(unexpired_combos(timezone.now()))
+        return [build_combo_data(combo) for combo in combos]
+
+
+class ComboDetailView(APIView):
+    def get(self, request, combo_id):
+        combo = tagged_cache.get_or_set(
+            ('combo', combo_id), COMBO_CACHE_TAGS, lambda: self.build_combo(combo_id)
+        )
+        if combo is None or not is_available(combo, timezone.now()):
+            return Response(
+                {"error": "Combo not found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return etag_response(request, {"combo": combo}, compute_etag({"combo": combo}))
+
+    def build_combo(self, combo_id):
+        combo = combos_with_items(unexpired_combos(timezone.now())).filter(id=combo_id).first()
+        return build_combo_data(combo) if combo else None
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'products',
     'accounts',
@@ -56,6 +57,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'utils.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -100,6 +102,18 @@ DATABASES = {
 }
 
 
+# Cache
+# Shared (L2) tier of utils.cache.TaggedCache. The local-memory default is a
+# per-process stand-in; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend such as django.core.cache.backends.redis.RedisCache in production.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'economies-store'),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -146,6 +160,32 @@ REST_FRAMEWORK = {
     ),
 }
 
+# FAST_JSON=true swaps DRF's json renderer/parser for the orjson-backed ones
+# (see `manage.py bench_renderers`); the output format is the same.
+if os.getenv('FAST_JSON', 'False').lower() == 'true':
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = (
+        'utils.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    )
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = (
+        'utils.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    )
+
+# Serve ProductListView brand/category/price pages from an in-process numpy
+# snapshot of the catalog (see products/columnar.py). Costs memory per worker.
+COLUMNAR_CATALOG = os.getenv('COLUMNAR_CATALOG', 'False').lower() == 'true'
+
+# Responses smaller than this are sent uncompressed.
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+
+# Carts not written to for this many days are purged (utils/purge.py).
+CART_IDLE_DAYS = int(os.getenv('CART_IDLE_DAYS', 90))
+# Seconds between in-process purges; 0 leaves it to a scheduled
+# `manage.py purge_stale_data`.
+PURGE_INTERVAL = int(os.getenv('PURGE_INTERVAL', 0))
+
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
 EMAIL_HOST = 'smtp.gmail.com'
@@ -25,5 +25,6 @@ urlpatterns = [
     path('api/categories/', include('categories.urls')),
     path('api/cart/', include('cart.urls')),
     path('api/orders/', include('orders.urls')),
+    path('api/combos/', include('combos.urls')),
     path('api/statistics/', include('orders.statistics_urls')),
 ]
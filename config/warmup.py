@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    # Called once per serving process, after the application is loaded.
+    from products.columnar import columnar_catalog
+    from products.suggest import suggestions
+    from utils.purge import start_purge_scheduler
+
+    try:
+        suggestions.warm()
+    except DatabaseError:
+        logger.warning("Skipping cache warm-up: database is not ready.", exc_info=True)
+
+    if settings.COLUMNAR_CATALOG:
+        # Loads in a background thread; list pages use SQL until it is ready.
+        columnar_catalog.start_loading()
+
+    if settings.PURGE_INTERVAL:
+        start_purge_scheduler(settings.PURGE_INTERVAL)
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from accounts.constants import get_rank_by_amount
+
+
+def order_totals(subtotal_amount, combos_applied, total_spent):
+    """Discounts and final amount for an order, shared by checkout and the
+    cart summary so the two cannot drift.
+
+    Combo savings come first; the rank bonus applies to what is left.
+    """
+    combo_discount = sum((c.savings for c in combos_applied), Decimal("0"))
+    rank, bonus_percent = get_rank_by_amount(total_spent)
+    rank_discount = (
+        (subtotal_amount - combo_discount) * Decimal(bonus_percent) / Decimal(100)
+    )
+    discount_amount = combo_discount + rank_discount
+    return {
+        "subtotal_amount": subtotal_amount,
+        "rank": rank,
+        "bonus_percent": bonus_percent,
+        "combo_discount": combo_discount,
+        "combos_applied": [c.as_dict() for c in combos_applied],
+        "rank_discount": rank_discount,
+        "discount_amount": discount_amount,
+        "final_amount": subtotal_amount - discount_amount,
+    }
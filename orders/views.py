@@ -17,6 +17,10 @@ from accounts.constants import get_rank_by_amount
 from django.db.models import Sum, Count, Avg
 from datetime import datetime
 from utils.email import send_order_email
+from combos.engine import apply_combos
+from combos.redemptions import record_redemptions, redeem_combos, release_redemptions
+from cart.cache import notify_cart_changed
+from .pricing import order_totals
 
 def build_order_data(order):
     def to_local(dt):
@@ -88,12 +92,14 @@ class CreateOrderView(APIView):
             subtotal_amount += Decimal(product.price) * quantity
             product_ids.append(product.id)
 
-        rank, bonus_percent = get_rank_by_amount(user.total_spent)
-
-        discount_amount = (
-            subtotal_amount * Decimal(bonus_percent) / Decimal(100)
+        # Combo trước, rank bonus tính trên phần còn lại
+        _, combos_applied = apply_combos(
+            order_items_data, {product.id: product.price for product in products}
         )
-        final_amount = subtotal_amount - discount_amount
+        # Combo giới hạn số lượt: trừ lượt ngay trong transaction, hết lượt thì bỏ
+        combos_applied, redemptions = redeem_combos(combos_applied)
+        totals = order_totals(subtotal_amount, combos_applied, user.total_spent)
+        rank = totals["rank"]
 
         # Tạo order
         order = Order.objects.create(
@@ -105,8 +111,8 @@ class CreateOrderView(APIView):
 
             subtotal_amount=subtotal_amount,
             rank_at_time=rank,
-            discount_amount=discount_amount,
-            final_amount=final_amount,
+            discount_amount=totals["discount_amount"],
+            final_amount=totals["final_amount"],
         )
 
         # Tạo order items
@@ -117,14 +123,17 @@ class CreateOrderView(APIView):
                 quantity=order_items_data[product.id],
                 price_at_order=product.price
             )
+        record_redemptions(order, redemptions)
 
         # Xóa cart
         CartItem.objects.filter(
             cart__user=user,
             product_id__in=product_ids
         ).delete()
+        notify_cart_changed(user.id)
         
-        send_order_email(request,user)
+        # Gửi mail sau commit để không giữ lock trong lúc gửi
+        transaction.on_commit(lambda: send_order_email(request, user), robust=True)
 
         return Response(
             {
@@ -133,9 +142,11 @@ class CreateOrderView(APIView):
                 "rank_at_time": rank,
                 "subtotal_amount": subtotal_amount,
                 
-                "bonus_percent": bonus_percent,
-                "discount_amount": discount_amount,
-                "final_amount": final_amount
+                "bonus_percent": totals["bonus_percent"],
+                "combo_discount": totals["combo_discount"],
+                "combos_applied": totals["combos_applied"],
+                "discount_amount": totals["discount_amount"],
+                "final_amount": totals["final_amount"]
             },
             status=201
         )
@@ -176,12 +187,14 @@ class OrderDetailView(APIView):
 class DeleteOrderView(APIView):
     permission_classes =  [IsAuthenticated]
     
+    @transaction.atomic
     def delete(self, request, order_id):
         user = request.user
         try:
-            order = Order.objects.get(id=order_id, user=user)
+            order = Order.objects.select_for_update().get(id=order_id, user=user)
             if order.order_status != Order.PENDING:
                 return Response({"error": "Only pending orders can be deleted"}, status=400)
+            release_redemptions(order)
             order.delete()
             return Response({"message": "Order deleted successfully"}, status=200)
         except Order.DoesNotExist:
@@ -302,6 +315,9 @@ class AdminUpdateOrderStatusView(APIView):
             user.rank, _ = get_rank_by_amount(user.total_spent)
             user.save(update_fields=["total_spent", "rank"])
 
+        if new_status == Order.CANCELLED:
+            release_redemptions(order)
+
         order.order_status = new_status
         order.save()
 
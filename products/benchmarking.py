@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import random
+import time
+from decimal import Decimal
+
+from categories.models import Category
+from products.models import Product
+
+SEED_BATCH_SIZE = 5000
+BENCH_BRANDS = [f'Brand {i:02d}' for i in range(50)]
+BENCH_CATEGORIES = [f'Bench category {i:02d}' for i in range(20)]
+
+
+def seed_products(rows, seed=221):
+    rng = random.Random(seed)
+    categories = [
+        Category.objects.get_or_create(name=name)[0]
+        for name in BENCH_CATEGORIES
+    ]
+
+    batch = []
+    for i in range(rows):
+        batch.append(Product(
+            name=f'Bench product {i}',
+            description='Benchmark product',
+            price=Decimal(rng.randrange(100_000, 60_000_000, 1000)),
+            image_url='https://example.com/bench.png',
+            category=rng.choice(categories),
+            specification={
+                'ram': rng.choice(['8GB', '16GB', '32GB']),
+                'screen_size': rng.choice([13.3, 14, 15.6, 16]),
+            },
+            brand=rng.choice(BENCH_BRANDS),
+            is_in_stock=rng.random() > 0.1,
+            is_deleted=rng.random() < 0.05,
+        ))
+        if len(batch) >= SEED_BATCH_SIZE:
+            Product.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Product.objects.bulk_create(batch)
+
+    return categories
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def time_call(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+    }
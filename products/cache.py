@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from categories.models import ancestors
+from .filters import split_param
+
+# Every cached catalog entry carries CATALOG_TAG, so bulk writes can drop
+# them all at once. Lists without a category filter carry PRODUCT_LIST_TAG;
+# category-filtered lists carry one tag per category instead, so a write
+# only invalidates the lists that can contain the product.
+CATALOG_TAG = 'catalog'
+PRODUCT_LIST_TAG = 'product-list'
+CATEGORIES_TAG = 'categories'
+
+
+def product_tag(product_id):
+    return f'product:{product_id}'
+
+
+def category_tag(name):
+    return f'category:{name}'
+
+
+def list_tags(params):
+    category_param = params.get('category')
+    if category_param:
+        names = sorted(set(split_param(category_param)))
+        return [CATALOG_TAG] + [category_tag(name) for name in names]
+    return [CATALOG_TAG, PRODUCT_LIST_TAG]
+
+
+def detail_tags(product_id):
+    return [CATALOG_TAG, product_tag(product_id)]
+
+
+def changed_product_tags(products):
+    if products is None:
+        return [CATALOG_TAG]
+
+    # A category filter also matches products of its subcategories.
+    category_ids = {p.category_id for p in products if p.category_id}
+    category_names = ancestors(category_ids).values_list('name', flat=True)
+
+    return (
+        [PRODUCT_LIST_TAG]
+        + [product_tag(p.id) for p in products]
+        + [category_tag(name) for name in category_names]
+    )
@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+
+from django.db import connections
+from django.utils import timezone
+
+from categories.models import Category
+from utils.cache import tagged_cache
+from .cache import CATALOG_TAG, PRODUCT_LIST_TAG
+from .filters import SPEC_PREFIX, split_param
+from .models import Product
+from .pagination import decode_cursor, encode_cursor
+
+try:
+    import numpy as np
+except ImportError:  # optional; ProductListView stays on SQL without it
+    np = None
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+INT64_MIN, INT64_MAX = -2**63, 2**63 - 1
+LOAD_CHUNK_SIZE = 20_000
+SCAN_CHUNK_SIZE = 16_384
+# Rows are re-read from a little before the newest updated_at already seen,
+# so writes that committed late with an older timestamp are not missed.
+REFRESH_OVERLAP = timedelta(seconds=30)
+# A full reload also picks up rows that left the table without an update.
+MAX_SNAPSHOT_AGE = 600
+# Seconds before retrying a failed load or refresh, doubling per failure.
+RETRY_DELAY = 5
+MAX_RETRY_DELAY = 300
+# Products without a category; category ids start at 1, so it never
+# matches a category filter.
+NO_CATEGORY = 0
+# Sort fields the snapshot can order by; everything else is served by SQL.
+SORT_COLUMNS = ('created_at', 'price')
+COLUMNS = ('id', 'price', 'created_at', 'brand', 'category_id', 'is_in_stock', 'is_deleted', 'updated_at')
+
+
+def lookup_table(values, size):
+    # Membership by indexing a boolean table with the dictionary codes;
+    # cheaper than np.isin, which compares the column once per value.
+    table = np.zeros(size, dtype=bool)
+    table[[v for v in values if 0 <= v < size]] = True
+    return table
+
+
+def first_matches(order, tests, limit):
+    # Filters are evaluated a chunk of the sort order at a time: a page is
+    # usually complete long before the end, so most rows are never read.
+    found = []
+    count = 0
+    for start in range(0, len(order), SCAN_CHUNK_SIZE):
+        chunk = order[start:start + SCAN_CHUNK_SIZE]
+        mask = tests[0](chunk)
+        for test in tests[1:]:
+            mask &= test(chunk)
+        hits = chunk[mask]
+        found.append(hits)
+        count += len(hits)
+        if count >= limit:
+            break
+    if not found:
+        return order[:0]
+    return np.concatenate(found)[:limit]
+
+
+def to_cents(price):
+    return int(price.scaleb(2))
+
+
+def to_micros(dt):
+    return (dt - EPOCH) // MICROSECOND
+
+
+class CatalogSnapshot:
+    """Immutable columnar copy of the live catalog.
+
+    ``ids`` is sorted; the other arrays are aligned with it. Refreshing
+    builds a new snapshot, so a request can keep using the one it started
+    with while another thread swaps in the next.
+    """
+
+    def __init__(self, columns, brands, categories, versions, high_water, loaded_at=None):
+        self.ids = columns['id']
+        self.price = columns['price']
+        self.created_at = columns['created_at']
+        self.brand = columns['brand']
+        self.category_id = columns['category_id']
+        self.in_stock = columns['is_in_stock']
+        self.alive = columns['alive']
+        self.brands = brands
+        self.brand_codes = {brand: code for code, brand in enumerate(brands)}
+        self.categories = categories
+        self.max_category_id = int(self.category_id.max()) if len(self.category_id) else 0
+        self.versions = versions
+        self.high_water = high_water
+        # When the full load behind this snapshot ran; refreshes keep it.
+        self.loaded_at = time.monotonic() if loaded_at is None else loaded_at
+        # Positions ordered by (value, id); descending sorts walk it backwards.
+        self.orders = {
+            'price': np.lexsort((self.ids, self.price)),
+            'created_at': np.lexsort((self.ids, self.created_at)),
+        }
+        self.sorted_keys = {
+            'price': self.price[self.orders['price']],
+            'created_at': self.created_at[self.orders['created_at']],
+        }
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    @classmethod
+    def load(cls, versions):
+        # Rows written while the load runs may or may not be seen, so the
+        # first refresh re-reads from when it started.
+        started = timezone.now()
+        brands = []
+        brand_codes = {}
+        builder = _ColumnBuilder(brands, brand_codes)
+        queryset = (
+            Product.objects.filter(is_deleted=False)
+            .order_by('id')
+            .values_list(*COLUMNS)
+        )
+        for row in queryset.iterator(chunk_size=LOAD_CHUNK_SIZE):
+            builder.add(row)
+        high_water = min(builder.high_water, started) if builder.high_water else None
+        return cls(builder.columns(), brands, load_categories(), versions, high_water)
+
+    def refreshed(self, versions):
+        since = self.high_water - REFRESH_OVERLAP if self.high_water else EPOCH
+        brands = list(self.brands)
+        brand_codes = dict(self.brand_codes)
+        builder = _ColumnBuilder(brands, brand_codes)
+        for row in Product.objects.filter(updated_at__gte=since).values_list(*COLUMNS):
+            builder.add(row)
+
+        changed = builder.columns()
+        columns = {
+            'id': self.ids, 'price': self.price, 'created_at': self.created_at,
+            'brand': self.brand, 'category_id': self.category_id,
+            'is_in_stock': self.in_stock, 'alive': self.alive,
+        }
+        if len(changed['id']):
+            positions = np.searchsorted(self.ids, changed['id'])
+            known = positions < len(self.ids)
+            known[known] = self.ids[positions[known]] == changed['id'][known]
+
+            merged = {}
+            for name, column in columns.items():
+                column = column.copy()
+                column[positions[known]] = changed[name][known]
+                merged[name] = np.concatenate([column, changed[name][~known]])
+            if not known.all():
+                # New ids are usually the largest, but concurrent inserts can
+                # commit out of order.
+                order = np.argsort(merged['id'], kind='stable')
+                merged = {name: column[order] for name, column in merged.items()}
+            columns = merged
+
+        high_water = max(self.high_water or EPOCH, builder.high_water or EPOCH)
+        return type(self)(columns, brands, load_categories(), versions, high_water, self.loaded_at)
+
+    def page(self, params, field, descending, page_size, cursor=None, parse_value=str):
+        """Ids of one ProductListView page and the next cursor.
+
+        Returns None when the query needs something the snapshot does not
+        hold (spec filters, name sort) so the caller can use SQL instead.
+        """
+        if field not in SORT_COLUMNS or any(key.startswith(SPEC_PREFIX) for key in params):
+            return None
+        tests = self.filter_tests(params)
+        if tests is None:
+            return None
+
+        order = self.orders[field]
+        keys = self.price if field == 'price' else self.created_at
+        if cursor:
+            value, last_id = decode_cursor(cursor, parse_value)
+            value = to_cents(value) if field == 'price' else to_micros(value)
+            if not INT64_MIN <= value <= INT64_MAX:
+                # Beyond the int64 keys; SQL compares it exactly.
+                return None
+            # Rows tied on the sort value are ordered by id inside their run.
+            sorted_keys = self.sorted_keys[field]
+            low = np.searchsorted(sorted_keys, value, 'left')
+            high = np.searchsorted(sorted_keys, value, 'right')
+            tied_ids = self.ids[order[low:high]]
+            if descending:
+                order = order[:low + np.searchsorted(tied_ids, last_id, 'left')]
+            else:
+                order = order[low + np.searchsorted(tied_ids, last_id, 'right'):]
+        if descending:
+            order = order[::-1]
+
+        positions = first_matches(order, tests, page_size + 1)
+
+        next_cursor = None
+        if len(positions) > page_size:
+            positions = positions[:page_size]
+            last = positions[-1]
+            if field == 'price':
+                value = Decimal(int(keys[last])).scaleb(-2)
+            else:
+                value = EPOCH + int(keys[last]) * MICROSECOND
+            next_cursor = encode_cursor(value, int(self.ids[last]))
+
+        return [int(i) for i in self.ids[positions]], next_cursor
+
+    def filter_tests(self, params):
+        """Per-filter predicates over an array of row positions."""
+        tests = [lambda p: self.alive[p]]
+
+        brand_param = params.get('brand')
+        if brand_param:
+            codes = [self.brand_codes[b] for b in split_param(brand_param) if b in self.brand_codes]
+            brands = lookup_table(codes, len(self.brands))
+            tests.append(lambda p: brands[self.brand[p]])
+        category_param = params.get('category')
+        if category_param:
+            ids = [i for name in split_param(category_param) for i in self.categories.get(name, ())]
+            categories = lookup_table(ids, self.max_category_id + 1)
+            tests.append(lambda p: categories[self.category_id[p]])
+
+        min_price = params.get('min_price')
+        max_price = params.get('max_price')
+        for value in (min_price, max_price):
+            if value and not Decimal(value).is_finite():
+                return None
+        if min_price:
+            low = int(Decimal(min_price).scaleb(2).to_integral_value(ROUND_CEILING))
+            tests.append(lambda p: self.price[p] >= low)
+        if max_price:
+            high = int(Decimal(max_price).scaleb(2).to_integral_value(ROUND_FLOOR))
+            tests.append(lambda p: self.price[p] <= high)
+        return tests
+
+
+class _ColumnBuilder:
+    def __init__(self, brands, brand_codes):
+        self.brands = brands
+        self.brand_codes = brand_codes
+        self.rows = {name: [] for name in ('id', 'price', 'created_at', 'brand', 'category_id', 'is_in_stock', 'alive')}
+        self.high_water = None
+
+    def add(self, row):
+        product_id, price, created_at, brand, category_id, in_stock, deleted, updated_at = row
+        code = self.brand_codes.get(brand)
+        if code is None:
+            code = self.brand_codes[brand] = len(self.brands)
+            self.brands.append(brand)
+
+        self.rows['id'].append(product_id)
+        self.rows['price'].append(to_cents(price))
+        self.rows['created_at'].append(to_micros(created_at))
+        self.rows['brand'].append(code)
+        self.rows['category_id'].append(NO_CATEGORY if category_id is None else category_id)
+        self.rows['is_in_stock'].append(in_stock)
+        self.rows['alive'].append(not deleted)
+        if self.high_water is None or updated_at > self.high_water:
+            self.high_water = updated_at
+
+    def columns(self):
+        dtypes = {'brand': np.int32, 'category_id': np.int64, 'is_in_stock': bool, 'alive': bool}
+        columns = {
+            name: np.array(values, dtype=dtypes.get(name, np.int64))
+            for name, values in self.rows.items()
+        }
+        if len(columns['id']) and np.any(np.diff(columns['id']) <= 0):
+            order = np.argsort(columns['id'], kind='stable')
+            columns = {name: column[order] for name, column in columns.items()}
+        return columns
+
+
+def load_categories():
+    # name -> ids of every category in the subtrees with that name. Ordered
+    # by path, a node's descendants are the rows right after it.
+    rows = list(Category.objects.order_by('path').values_list('name', 'id', 'path'))
+    categories = {}
+    for i, (name, _, path) in enumerate(rows):
+        ids = categories.setdefault(name, [])
+        for _, category_id, other_path in itertools.takewhile(
+            lambda row: row[2].startswith(path), rows[i:]
+        ):
+            ids.append(category_id)
+    return categories
+
+
+class ColumnarCatalog:
+    """Per-process columnar snapshot used to answer ProductListView pages.
+
+    The snapshot is current while the catalog/product-list cache tag
+    versions match the ones it was built under; every product write bumps
+    them, in any process. A stale snapshot is refreshed incrementally from
+    ``updated_at`` by whichever request gets the lock first, and requests
+    arriving meanwhile fall back to SQL rather than wait. Full loads, at
+    startup and every ``max_age`` seconds, run in a background thread while
+    the previous snapshot (or SQL) keeps serving.
+    """
+
+    tags = (CATALOG_TAG, PRODUCT_LIST_TAG)
+
+    def __init__(self, cache=tagged_cache, max_age=MAX_SNAPSHOT_AGE):
+        self.cache = cache
+        self.max_age = max_age
+        self.snapshot = None
+        self._lock = threading.Lock()
+        self._loading = False
+        self._loading_lock = threading.Lock()
+        # Per action ('load', 'refresh'): consecutive failures, next attempt.
+        self._failures = {}
+        self._retry_at = {}
+
+    @property
+    def available(self):
+        return np is not None
+
+    def load(self):
+        snapshot = CatalogSnapshot.load(self.cache.tag_versions(self.tags))
+        with self._lock:
+            self.snapshot = snapshot
+        return snapshot
+
+    def _failed(self, action):
+        failures = self._failures[action] = self._failures.get(action, 0) + 1
+        delay = min(RETRY_DELAY * 2 ** (failures - 1), MAX_RETRY_DELAY)
+        self._retry_at[action] = time.monotonic() + delay
+        logger.exception("Columnar catalog %s failed; retrying in %ss.", action, delay)
+
+    def _succeeded(self, action):
+        self._failures.pop(action, None)
+
+    def _backing_off(self, action):
+        return time.monotonic() < self._retry_at.get(action, 0.0)
+
+    def start_loading(self):
+        with self._loading_lock:
+            if not self.available or self._loading or self._backing_off('load'):
+                return
+            self._loading = True
+        threading.Thread(target=self._load_in_background, daemon=True).start()
+
+    def _load_in_background(self):
+        try:
+            self.load()
+            self._succeeded('load')
+        except Exception:
+            self._failed('load')
+        finally:
+            self._loading = False
+            connections.close_all()
+
+    def current(self):
+        if not self.available:
+            return None
+
+        snapshot = self.snapshot
+        if snapshot is None:
+            self.start_loading()
+            return None
+
+        if time.monotonic() - snapshot.loaded_at >= self.max_age:
+            self.start_loading()
+        versions = self.cache.tag_versions(self.tags)
+        if versions == snapshot.versions:
+            return snapshot
+
+        if self._backing_off('refresh') or not self._lock.acquire(blocking=False):
+            return None
+        try:
+            snapshot = self.snapshot
+            if versions != snapshot.versions:
+                snapshot = self.snapshot = snapshot.refreshed(versions)
+            self._succeeded('refresh')
+        except Exception:
+            self._failed('refresh')
+            return None
+        finally:
+            self._lock.release()
+        return snapshot
+
+    def page(self, params, field, descending, page_size, cursor=None, parse_value=str):
+        snapshot = self.current()
+        if snapshot is None:
+            return None
+        return snapshot.page(params, field, descending, page_size, cursor, parse_value)
+
+
+columnar_catalog = ColumnarCatalog()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Count
+
+from categories.models import Category
+from .models import BrandCounter, Product
+
+# The FOR UPDATE CTE takes the row locks in id order before any row is
+# updated, whatever plan the UPDATE itself gets.
+UPDATE_CATEGORY_COUNTS_SQL = """
+WITH deltas (id, delta) AS (VALUES {values}),
+locked AS (
+    SELECT c.id FROM {table} c
+    WHERE c.id IN (SELECT id FROM deltas)
+    ORDER BY c.id
+    FOR UPDATE
+)
+UPDATE {table} c
+SET product_count = c.product_count + deltas.delta
+FROM deltas
+WHERE c.id = deltas.id AND c.id IN (SELECT id FROM locked)
+"""
+
+UPSERT_BRAND_COUNTS_SQL = """
+INSERT INTO {table} (brand, product_count) VALUES {values}
+ON CONFLICT (brand) DO UPDATE
+SET product_count = {table}.product_count + EXCLUDED.product_count
+"""
+
+
+def counter_key(product):
+    return (product.category_id, product.brand)
+
+
+def adjust_counters(added=(), removed=()):
+    """Count products that became live (``added``) or stopped being live
+    (``removed``), given as counter_key() pairs.
+
+    Run it in the transaction that changed the products, so the counters
+    commit or roll back with them.
+    """
+    categories = Counter()
+    brands = Counter()
+    for keys, sign in ((added, 1), (removed, -1)):
+        for category_id, brand in keys:
+            if category_id is not None:
+                categories[category_id] += sign
+            if brand is not None:
+                brands[brand] += sign
+
+    update_category_counts(categories)
+    update_brand_counts(brands)
+
+
+def update_category_counts(deltas):
+    # One statement for every category, locked in id order, so concurrent
+    # writers cannot deadlock on the counter rows.
+    rows = sorted((category_id, delta) for category_id, delta in deltas.items() if delta)
+    if not rows:
+        return
+    sql = UPDATE_CATEGORY_COUNTS_SQL.format(
+        table=Category._meta.db_table,
+        values=', '.join(['(%s::integer, %s::integer)'] * len(rows)),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [value for row in rows for value in row])
+
+
+def update_brand_counts(deltas):
+    # Sorted, so concurrent writers lock the counter rows in the same order.
+    rows = sorted((brand, delta) for brand, delta in deltas.items() if delta)
+    if not rows:
+        return
+    sql = UPSERT_BRAND_COUNTS_SQL.format(
+        table=BrandCounter._meta.db_table,
+        values=', '.join(['(%s, %s)'] * len(rows)),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [value for row in rows for value in row])
+
+
+def rebuild_counters(dry_run=False):
+    """Recount live products per category and brand.
+
+    Returns the drifted counters as dicts with the stored and actual value;
+    unless ``dry_run``, they are corrected. Product writes are blocked
+    while the counts are taken.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {Product._meta.db_table} IN SHARE MODE')
+
+        live = Product.objects.filter(is_deleted=False).order_by()
+        actual_categories = dict(
+            live.exclude(category_id=None)
+            .values_list('category_id').annotate(count=Count('id'))
+        )
+        actual_brands = dict(
+            live.exclude(brand=None)
+            .values_list('brand').annotate(count=Count('id'))
+        )
+        stored_categories = dict(Category.objects.values_list('id', 'product_count'))
+        stored_brands = dict(BrandCounter.objects.values_list('brand', 'product_count'))
+
+        drift = [
+            {'category_id': category_id, 'stored': stored, 'actual': actual_categories.get(category_id, 0)}
+            for category_id, stored in sorted(stored_categories.items())
+            if stored != actual_categories.get(category_id, 0)
+        ] + [
+            {'brand': brand, 'stored': stored_brands.get(brand, 0), 'actual': actual_brands.get(brand, 0)}
+            for brand in sorted(set(stored_brands) | set(actual_brands))
+            if stored_brands.get(brand, 0) != actual_brands.get(brand, 0)
+        ]
+        if dry_run or not drift:
+            return drift
+
+        Category.objects.bulk_update(
+            [
+                Category(id=d['category_id'], product_count=d['actual'])
+                for d in drift if 'category_id' in d
+            ],
+            ['product_count'],
+        )
+        BrandCounter.objects.bulk_create(
+            [
+                BrandCounter(brand=d['brand'], product_count=d['actual'])
+                for d in drift if 'brand' in d and d['actual']
+            ],
+            update_conflicts=True,
+            unique_fields=['brand'],
+            update_fields=['product_count'],
+        )
+        BrandCounter.objects.filter(
+            brand__in=[d['brand'] for d in drift if 'brand' in d and not d['actual']]
+        ).delete()
+    return drift
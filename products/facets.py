@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import F, Value
+from django.db.models.functions import Floor, Least
+
+from .filters import filter_products
+from .models import Product
+
+DEFAULT_PRICE_BUCKET = Decimal('5000000')
+MIN_PRICE_BUCKET = Decimal('1000')
+# Prices past the last bucket are counted in it, so a narrow bucket_size
+# cannot turn the histogram into one row per distinct price.
+MAX_PRICE_BUCKETS = 100
+
+# GROUPING(brand, category_id, is_in_stock, bucket) is a bitmask with a bit
+# set for every column rolled up in the row; it tells the grouping sets apart.
+GROUPED_BY_BRAND = 0b0111
+GROUPED_BY_CATEGORY = 0b1011
+GROUPED_BY_STOCK = 0b1101
+GROUPED_BY_PRICE = 0b1110
+GROUPED_TOTAL = 0b1111
+
+FACETS_SQL = """
+SELECT t.brand, t.category_id, c.name, t.is_in_stock, t.bucket, COUNT(*),
+       GROUPING(t.brand, t.category_id, t.is_in_stock, t.bucket)
+FROM ({base}) t
+LEFT JOIN categories_category c ON c.id = t.category_id
+GROUP BY GROUPING SETS (
+    (t.brand), (t.category_id, c.name), (t.is_in_stock), (t.bucket), ()
+)
+"""
+
+
+def compute_facets(params, bucket_size=DEFAULT_PRICE_BUCKET):
+    products = (
+        filter_products(Product.objects.filter(is_deleted=False), params)
+        .annotate(bucket=Least(
+            Floor(F('price') / Value(bucket_size)),
+            Value(Decimal(MAX_PRICE_BUCKETS - 1)),
+        ))
+        .values('brand', 'category_id', 'is_in_stock', 'bucket')
+    )
+    base_sql, base_params = products.query.sql_with_params()
+
+    facets = {
+        'total': 0,
+        'brands': [],
+        'categories': [],
+        'in_stock': {'true': 0, 'false': 0},
+        'price_histogram': [],
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(FACETS_SQL.format(base=base_sql), base_params)
+        rows = cursor.fetchall()
+
+    for brand, category_id, category_name, in_stock, bucket, count, grouping in rows:
+        if grouping == GROUPED_TOTAL:
+            facets['total'] = count
+        elif grouping == GROUPED_BY_BRAND:
+            facets['brands'].append({'brand': brand, 'count': count})
+        elif grouping == GROUPED_BY_CATEGORY:
+            facets['categories'].append(
+                {'category_id': category_id, 'name': category_name, 'count': count}
+            )
+        elif grouping == GROUPED_BY_STOCK:
+            facets['in_stock']['true' if in_stock else 'false'] = count
+        elif grouping == GROUPED_BY_PRICE:
+            low = Decimal(bucket) * bucket_size
+            high = low + bucket_size if bucket < MAX_PRICE_BUCKETS - 1 else None
+            facets['price_histogram'].append(
+                {'min_price': low, 'max_price': high, 'count': count}
+            )
+
+    facets['brands'].sort(key=lambda f: (-f['count'], f['brand'] or ''))
+    facets['categories'].sort(key=lambda f: (-f['count'], f['name'] or ''))
+    facets['price_histogram'].sort(key=lambda f: f['min_price'])
+    return facets
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import math
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.utils.dateparse import parse_datetime
+
+from django.db.models import Q
+
+from categories.models import subtrees
+from .models import NUMERIC_SPEC_KEYS, SPEC_NUMBER_PATTERN, SPEC_UNIT_SCALES, spec_number
+
+FILTER_KEYS = ('brand', 'category', 'min_price', 'max_price')
+SPEC_PREFIX = 'spec.'
+SPEC_RANGE_LOOKUPS = ('gte', 'lte')
+
+
+class InvalidFilter(ValueError):
+    pass
+
+
+def _parse_datetime(value):
+    parsed = parse_datetime(value)
+    # Cursors are always issued with an offset; a naive one is not ours.
+    if parsed is None or parsed.tzinfo is None:
+        raise ValueError("Invalid datetime")
+    return parsed
+
+
+def _parse_decimal(value):
+    parsed = Decimal(value)
+    if not parsed.is_finite():
+        raise ValueError("Invalid decimal")
+    return parsed
+
+
+# sort name -> (field, descending, cursor value parser)
+SORT_OPTIONS = {
+    'newest': ('created_at', True, _parse_datetime),
+    'price_asc': ('price', False, _parse_decimal),
+    'price_desc': ('price', True, _parse_decimal),
+    'name': ('name', False, str),
+}
+DEFAULT_SORT = 'newest'
+
+
+def split_param(value):
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def normalize_filters(params):
+    # Canonical, hashable form of the filter parameters, used as a cache key.
+    normalized = []
+    for key in sorted(params):
+        if key in FILTER_KEYS or key.startswith(SPEC_PREFIX):
+            values = tuple(sorted(split_param(params.get(key) or '')))
+            if values:
+                normalized.append((key, values))
+    return tuple(normalized)
+
+
+def filter_products(products, params):
+    #Brand
+    brand_param = params.get('brand')
+    if brand_param:
+        products = products.filter(brand__in=split_param(brand_param))
+    #Category
+    category_param = params.get('category')
+    if category_param:
+        # Resolve names (and their subcategories) through a subquery so the
+        # live category index is used directly, without joining (and
+        # de-duplicating) the whole catalog.
+        category_ids = subtrees(split_param(category_param)).values('id')
+        products = products.filter(category_id__in=category_ids)
+    #Price
+    min_price = params.get('min_price')
+    max_price = params.get('max_price')
+
+    try:
+        if min_price:
+            products = products.filter(price__gte=Decimal(min_price))
+        if max_price:
+            products = products.filter(price__lte=Decimal(max_price))
+    except InvalidOperation:
+        raise InvalidFilter("Invalid price format")
+    #Specification
+    products = filter_specification(products, params)
+
+    return products
+
+
+def _spec_match_values(value):
+    # Query strings carry no JSON types, so "16" matches both "16" and 16.
+    # "nan"/"inf" stay strings: JSON has no non-finite numbers.
+    values = [value]
+    for parse in (int, float):
+        try:
+            number = parse(value)
+        except ValueError:
+            continue
+        if math.isfinite(number):
+            values.append(number)
+        break
+    return values
+
+
+def parse_spec_number(value):
+    # Mirrors models.spec_number(), so spec.storage__gte=1TB compares as 1024.
+    if not re.match(SPEC_NUMBER_PATTERN, value, re.IGNORECASE):
+        raise ValueError("Invalid number")
+    number = float(re.sub(r'[^0-9.]', '', value))
+    unit = re.sub(r'[\s0-9.]', '', value).lower()
+    return number * SPEC_UNIT_SCALES.get(unit, 1)
+
+
+def filter_specification(products, params):
+    exact = {}
+    ranges = []
+    for param in params:
+        if not param.startswith(SPEC_PREFIX):
+            continue
+        key, _, lookup = param[len(SPEC_PREFIX):].partition('__')
+        value = params.get(param)
+        if not key or not value:
+            continue
+
+        if not lookup:
+            exact[key] = split_param(value)
+        elif lookup in SPEC_RANGE_LOOKUPS and key in NUMERIC_SPEC_KEYS:
+            try:
+                ranges.append((key, lookup, parse_spec_number(value)))
+            except ValueError:
+                raise InvalidFilter(f"Invalid number for {param}")
+        else:
+            raise InvalidFilter(
+                f"Unsupported spec filter {param}. Range filters are available for: "
+                + ", ".join(NUMERIC_SPEC_KEYS)
+            )
+
+    # Single-valued keys share one containment test; each key with
+    # alternatives becomes an OR of containments. Both use the GIN index.
+    single = {}
+    for key, values in exact.items():
+        match_values = [v for value in values for v in _spec_match_values(value)]
+        if len(match_values) == 1:
+            single[key] = match_values[0]
+            continue
+        condition = Q()
+        for v in match_values:
+            condition |= Q(specification__contains={key: v})
+        products = products.filter(condition)
+    if single:
+        products = products.filter(specification__contains=single)
+
+    for key, lookup, number in ranges:
+        alias = f'spec_{key}'
+        products = products.alias(**{alias: spec_number(key)}).filter(
+            **{f'{alias}__{lookup}': number}
+        )
+
+    return products
+
+
+def get_sort_option(params):
+    sort = params.get('sort') or DEFAULT_SORT
+    if sort not in SORT_OPTIONS:
+        raise InvalidFilter(
+            "Invalid sort. Use one of: " + ", ".join(SORT_OPTIONS)
+        )
+    return SORT_OPTIONS[sort]
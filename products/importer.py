@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import codecs
+import csv
+import json
+
+from django.db import transaction
+
+from categories.models import Category
+from .counters import adjust_counters, counter_key
+from .models import Product
+from .signal import notify_products_changed
+from .validation import ProductValidationError, clean_product_data, reject_constant
+
+IMPORT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 100
+IMPORT_FORMATS = ('csv', 'jsonl')
+# Columns overwritten when an imported row's sku already exists.
+UPSERT_FIELDS = [
+    'name', 'description', 'price', 'image_url', 'category',
+    'specification', 'brand', 'is_in_stock', 'updated_at',
+]
+
+
+def guess_format(filename):
+    if filename and filename.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    return 'csv'
+
+
+def check_utf8(binary_stream, chunk_size=1 << 16):
+    """Raise UnicodeDecodeError unless the whole upload is UTF-8.
+
+    Run before importing, so a bad byte deep in the file is not found after
+    earlier batches were committed. Rewinds the stream.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for chunk in iter(lambda: binary_stream.read(chunk_size), b''):
+        decoder.decode(chunk)
+    decoder.decode(b'', final=True)
+    binary_stream.seek(0)
+
+
+def read_rows(stream, fmt):
+    """Yield (row number, dict) pairs from a text stream, one at a time."""
+    if fmt == 'csv':
+        for row_number, row in enumerate(csv.DictReader(stream), start=1):
+            yield row_number, row
+        return
+
+    for row_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line, parse_constant=reject_constant)
+        except ValueError:
+            row = None
+        yield row_number, row
+
+
+class ProductImporter:
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE, progress=None):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.category_ids = set(Category.objects.values_list('id', flat=True))
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+
+    def run(self, stream, fmt):
+        batch = {}
+        for row_number, row in read_rows(stream, fmt):
+            product = self.clean_row(row_number, row)
+            if product is None:
+                continue
+
+            # Only the last row per sku in a batch is kept: ON CONFLICT cannot
+            # update the same row twice in one statement.
+            key = product.sku or ('row', row_number)
+            batch[key] = product
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = {}
+
+        if batch:
+            self.flush(batch)
+        if self.imported:
+            notify_products_changed()
+        return self.report()
+
+    def clean_row(self, row_number, row):
+        if not isinstance(row, dict):
+            self.add_error(row_number, "Row must be a JSON object")
+            return None
+
+        try:
+            cleaned = clean_product_data(row)
+            try:
+                cleaned['category_id'] = int(cleaned['category_id'])
+            except (TypeError, ValueError):
+                raise ProductValidationError("category_id must be an integer")
+            if cleaned['category_id'] not in self.category_ids:
+                raise ProductValidationError("Category not found")
+        except ProductValidationError as e:
+            self.add_error(row_number, e.message, e.fields)
+            return None
+
+        return Product(**cleaned)
+
+    def flush(self, batch):
+        products = list(batch.values())
+        with transaction.atomic():
+            # Live rows about to be overwritten leave their old category and
+            # brand counters; locked so a concurrent import sees the new state.
+            existing = {
+                sku: (category_id, brand, is_deleted)
+                for sku, category_id, brand, is_deleted in Product.objects
+                .select_for_update()
+                .filter(sku__in=[p.sku for p in products if p.sku])
+                .values_list('sku', 'category_id', 'brand', 'is_deleted')
+            }
+            Product.objects.bulk_create(
+                products,
+                update_conflicts=True,
+                unique_fields=['sku'],
+                update_fields=UPSERT_FIELDS,
+            )
+            # Upserts keep is_deleted, so soft-deleted rows stay uncounted.
+            adjust_counters(
+                added=[
+                    counter_key(p) for p in products
+                    if p.sku not in existing or not existing[p.sku][2]
+                ],
+                removed=[
+                    (category_id, brand)
+                    for category_id, brand, is_deleted in existing.values()
+                    if not is_deleted
+                ],
+            )
+        self.imported += len(batch)
+        if self.progress:
+            self.progress(self.imported, self.error_count)
+
+    def add_error(self, row_number, message, fields=None):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            error = {"row": row_number, "error": message}
+            if fields:
+                error["fields"] = fields
+            self.errors.append(error)
+
+    def report(self):
+        return {
+            "imported": self.imported,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import itertools
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import QueryDict
+
+from products.benchmarking import BENCH_BRANDS, BENCH_CATEGORIES, seed_products, time_call
+from products.filters import SORT_OPTIONS, filter_products
+from products.pagination import DEFAULT_PAGE_SIZE, order_for_keyset
+from products.views import live_products
+
+# One representative value per ProductListView filter.
+FILTER_PARAMS = {
+    'brand': ','.join(BENCH_BRANDS[:3]),
+    'category': BENCH_CATEGORIES[0],
+    'min_price': '5000000',
+    'max_price': '20000000',
+    'spec.ram': '16GB',
+    'spec.screen_size__gte': '15',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic catalog and record EXPLAIN output and p50/p99 latency "
+        "for every ProductListView filter and sort combination. The seeded rows "
+        "are rolled back unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded products.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['rows']} products...")
+            seed_products(options['rows'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE products_product')
+
+            report = [
+                self.run_case(filters, sort, options['repeat'])
+                for filters in self.filter_combinations()
+                for sort in SORT_OPTIONS
+            ]
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def filter_combinations(self):
+        names = list(FILTER_PARAMS)
+        for size in range(len(names) + 1):
+            for combo in itertools.combinations(names, size):
+                yield {name: FILTER_PARAMS[name] for name in combo}
+
+    def run_case(self, filters, sort, repeat):
+        params = QueryDict(mutable=True)
+        params.update(filters)
+        field, descending, _ = SORT_OPTIONS[sort]
+        queryset = order_for_keyset(
+            filter_products(live_products(), params), field, descending
+        )[:DEFAULT_PAGE_SIZE + 1]
+
+        plan = queryset.explain(analyze=True, buffers=True)
+        timings = time_call(lambda: list(queryset.all()), repeat)
+
+        label = ', '.join(f'{k}={v}' for k, v in filters.items()) or 'no filters'
+        self.stdout.write(
+            f"[{sort}] {label}: p50={timings['p50_ms']}ms p99={timings['p99_ms']}ms"
+        )
+        self.stdout.write(plan)
+        return {'filters': filters, 'sort': sort, 'plan': plan, **timings}
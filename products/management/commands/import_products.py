@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.importer import IMPORT_BATCH_SIZE, IMPORT_FORMATS, ProductImporter, check_utf8, guess_format
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream products from a CSV or JSONL file into the catalog in batches. "
+        "Rows with a sku that already exists update that product."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=IMPORT_FORMATS)
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or guess_format(options['path'])
+        importer = ProductImporter(
+            batch_size=options['batch_size'],
+            progress=lambda imported, errors: self.stdout.write(
+                f"Imported {imported} rows ({errors} rejected)"
+            ),
+        )
+
+        try:
+            with open(options['path'], 'rb') as binary_stream:
+                check_utf8(binary_stream)
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                report = importer.run(stream, fmt)
+        except OSError as e:
+            raise CommandError(str(e))
+        except UnicodeDecodeError:
+            raise CommandError("The file must be UTF-8 encoded.")
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['error']} {error.get('fields', '')}".rstrip())
+        if report['error_count'] > len(report['errors']):
+            self.stderr.write(f"... {report['error_count'] - len(report['errors'])} more errors")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {report['imported']} imported, {report['error_count']} rejected."
+        ))
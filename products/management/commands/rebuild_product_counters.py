@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from products.cache import CATALOG_TAG
+from products.counters import rebuild_counters
+from utils.cache import tagged_cache
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount live products per category and per brand, report every "
+        "counter that drifted from the real count and correct it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only report the drift.")
+
+    def handle(self, *args, **options):
+        drift = rebuild_counters(dry_run=options['dry_run'])
+
+        for counter in drift:
+            label = (
+                f"category {counter['category_id']}" if 'category_id' in counter
+                else f"brand {counter['brand']!r}"
+            )
+            self.stdout.write(f"{label}: stored {counter['stored']}, actual {counter['actual']}")
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("All counters match."))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} counters drifted (not corrected)."))
+        else:
+            tagged_cache.invalidate_tags([CATALOG_TAG])
+            self.stdout.write(self.style.SUCCESS(f"Corrected {len(drift)} counters."))
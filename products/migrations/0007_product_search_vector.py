@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:13
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+SEARCH_VECTOR_SQL = """
+CREATE FUNCTION products_product_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(NEW.brand, '')), 'A') ||
+        setweight(jsonb_to_tsvector('simple', coalesce(NEW.specification, '{}'::jsonb), '["string", "numeric"]'), 'B') ||
+        setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER products_product_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, brand, description, specification
+    ON products_product
+    FOR EACH ROW EXECUTE FUNCTION products_product_search_vector_update();
+
+UPDATE products_product SET name = name;
+"""
+
+REVERSE_SEARCH_VECTOR_SQL = """
+DROP TRIGGER IF EXISTS products_product_search_vector_trigger ON products_product;
+DROP FUNCTION IF EXISTS products_product_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0003_alter_category_created_at'),
+        ('products', '0005_product_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_SQL, REVERSE_SEARCH_VECTOR_SQL),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('is_deleted', False)), fields=['search_vector'], name='product_live_search_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:15
+
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0003_alter_category_created_at'),
+        ('products', '0007_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('name'), 'C'), condition=models.Q(('is_deleted', False)), name='product_live_name_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(django.db.models.functions.comparison.Collate(django.db.models.functions.text.Upper('brand'), 'C'), condition=models.Q(('is_deleted', False)), name='product_live_brand_prefix_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:15
+
+import django.contrib.postgres.indexes
+import django.db.models.fields.json
+import django.db.models.functions.comparison
+import django.db.models.lookups
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0003_alter_category_created_at'),
+        ('products', '0008_product_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('is_deleted', False)), fields=['specification'], name='product_live_spec_idx', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(models.Case(models.When(django.db.models.lookups.Exact(models.Func(django.db.models.fields.json.KeyTransform('ram', 'specification'), function='jsonb_typeof', output_field=models.CharField()), 'number'), then=django.db.models.functions.comparison.Cast(django.db.models.fields.json.KeyTransform('ram', 'specification'), models.FloatField())), output_field=models.FloatField()), condition=models.Q(('is_deleted', False)), name='product_live_spec_ram_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(models.Case(models.When(django.db.models.lookups.Exact(models.Func(django.db.models.fields.json.KeyTransform('storage', 'specification'), function='jsonb_typeof', output_field=models.CharField()), 'number'), then=django.db.models.functions.comparison.Cast(django.db.models.fields.json.KeyTransform('storage', 'specification'), models.FloatField())), output_field=models.FloatField()), condition=models.Q(('is_deleted', False)), name='product_live_spec_storage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(models.Case(models.When(django.db.models.lookups.Exact(models.Func(django.db.models.fields.json.KeyTransform('screen_size', 'specification'), function='jsonb_typeof', output_field=models.CharField()), 'number'), then=django.db.models.functions.comparison.Cast(django.db.models.fields.json.KeyTransform('screen_size', 'specification'), models.FloatField())), output_field=models.FloatField()), condition=models.Q(('is_deleted', False)), name='product_live_spec_screen_idx'),
+        ),
+    ]
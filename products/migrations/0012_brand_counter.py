@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_product_updated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BrandCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('brand', models.CharField(max_length=100, unique=True)),
+                ('product_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO products_brandcounter (brand, product_count)
+            SELECT brand, COUNT(*) FROM products_product
+            WHERE NOT is_deleted AND brand IS NOT NULL
+            GROUP BY brand
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
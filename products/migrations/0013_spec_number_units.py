@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:27
+
+import django.db.models.expressions
+import django.db.models.fields.json
+import django.db.models.functions.comparison
+import django.db.models.lookups
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('categories', '0005_category_product_count'),
+        ('products', '0012_brand_counter'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_live_spec_ram_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_live_spec_storage_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_live_spec_screen_idx',
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(models.Case(models.When(django.db.models.lookups.Exact(models.Func(django.db.models.fields.json.KeyTransform('ram', 'specification'), function='jsonb_typeof', output_field=models.CharField()), 'number'), then=django.db.models.functions.comparison.Cast(django.db.models.fields.json.KeyTransform('ram', 'specification'), models.FloatField())), models.When(models.Q(django.db.models.lookups.Exact(models.Func(django.db.models.fields.json.KeyTransform('ram', 'specification'), function='jsonb_typeof', output_field=models.CharField()), 'string'), django.db.models.lookups.IRegex(django.db.models.fields.json.KeyTextTransform('ram', 'specification'), '^\\s*[0-9]+(\\.[0-9]+)?\\s*(mb|gb|tb|in|inch|inches|")?\\s*$')), then=django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast(models.Func(django.db.models.fields.json.KeyTextTransform('ram', 'specification'), models.Value('[0-9]+(?:\\.[0-9]+)?'), function='substring'), models.FloatField()), '*', models.Case(models.When(django.db.models.lookups.IRegex(django.db.models.fields.json.KeyTextTransform('ram', 'specification'), 'mb\\s*$'), then=models.Value(0.0009765625)), models.When(django.db.models.lookups.IRegex(django.db.models.fields.json.KeyTextTransform('ram', 'specification'), 'tb\\s*$'), then=models.Value(1024.0)), default=models.Value(1.0), output_field=models.FloatField()))), output_field=models.FloatField()), condition=models.Q(('is_deleted', False)), name='product_live_spec_ram_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(models.Case(models.When(django.db.models.lookups.Exact(models.Func(django.db.models.fields.json.KeyTransform('storage', 'specification'), function='jsonb_typeof', output_field=models.CharField()), 'number'), then=django.db.models.functions.comparison.Cast(django.db.models.fields.json.KeyTransform('storage', 'specification'), models.FloatField())), models.When(models.Q(django.db.models.lookups.Exact(models.Func(django.db.models.fields.json.KeyTransform('storage', 'specification'), function='jsonb_typeof', output_field=models.CharField()), 'string'), django.db.models.lookups.IRegex(django.db.models.fields.json.KeyTextTransform('storage', 'specification'), '^\\s*[0-9]+(\\.[0-9]+)?\\s*(mb|gb|tb|in|inch|inches|")?\\s*$')), then=django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast(models.Func(django.db.models.fields.json.KeyTextTransform('storage', 'specification'), models.Value('[0-9]+(?:\\.[0-9]+)?'), function='substring'), models.FloatField()), '*', models.Case(models.When(django.db.models.lookups.IRegex(django.db.models.fields.json.KeyTextTransform('storage', 'specification'), 'mb\\s*$'), then=models.Value(0.0009765625)), models.When(django.db.models.lookups.IRegex(django.db.models.fields.json.KeyTextTransform('storage', 'specification'), 'tb\\s*$'), then=models.Value(1024.0)), default=models.Value(1.0), output_field=models.FloatField()))), output_field=models.FloatField()), condition=models.Q(('is_deleted', False)), name='product_live_spec_storage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(models.Case(models.When(django.db.models.lookups.Exact(models.Func(django.db.models.fields.json.KeyTransform('screen_size', 'specification'), function='jsonb_typeof', output_field=models.CharField()), 'number'), then=django.db.models.functions.comparison.Cast(django.db.models.fields.json.KeyTransform('screen_size', 'specification'), models.FloatField())), models.When(models.Q(django.db.models.lookups.Exact(models.Func(django.db.models.fields.json.KeyTransform('screen_size', 'specification'), function='jsonb_typeof', output_field=models.CharField()), 'string'), django.db.models.lookups.IRegex(django.db.models.fields.json.KeyTextTransform('screen_size', 'specification'), '^\\s*[0-9]+(\\.[0-9]+)?\\s*(mb|gb|tb|in|inch|inches|")?\\s*$')), then=django.db.models.expressions.CombinedExpression(django.db.models.functions.comparison.Cast(models.Func(django.db.models.fields.json.KeyTextTransform('screen_size', 'specification'), models.Value('[0-9]+(?:\\.[0-9]+)?'), function='substring'), models.FloatField()), '*', models.Case(models.When(django.db.models.lookups.IRegex(django.db.models.fields.json.KeyTextTransform('screen_size', 'specification'), 'mb\\s*$'), then=models.Value(0.0009765625)), models.When(django.db.models.lookups.IRegex(django.db.models.fields.json.KeyTextTransform('screen_size', 'specification'), 'tb\\s*$'), then=models.Value(1024.0)), default=models.Value(1.0), output_field=models.FloatField()))), output_field=models.FloatField()), condition=models.Q(('is_deleted', False)), name='product_live_spec_screen_idx'),
+        ),
+    ]
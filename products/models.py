@@ -1,10 +1,59 @@
 from __future__ import annotations
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.fields.json import KeyTextTransform, KeyTransform
+from django.db.models.functions import Cast, Collate, Upper
+from django.db.models.lookups import Exact, IRegex
+
+# specification keys that support numeric range filters; each has an
+# expression index below.
+NUMERIC_SPEC_KEYS = ('ram', 'storage', 'screen_size')
+
+
+# A number with an optional unit, e.g. "16GB", "1 TB" or "6.5 inch". Only
+# the units below are accepted; anything else ("8 Gbit") reads as NULL
+# rather than being mistaken for GB.
+SPEC_NUMBER_PATTERN = r'^\s*[0-9]+(\.[0-9]+)?\s*(mb|gb|tb|in|inch|inches|")?\s*$'
+# Units scaled on read so sizes compare across them; ram and storage are
+# in GB.
+SPEC_UNIT_SCALES = {'mb': 1 / 1024, 'tb': 1024}
+
+
+def spec_number(key):
+    # The JSON number, or the number a "16GB"-style string starts with;
+    # NULL for anything else, so an odd value never makes the cast (and
+    # therefore an INSERT) fail.
+    value = KeyTransform(key, 'specification')
+    text = KeyTextTransform(key, 'specification')
+    number = Cast(
+        models.Func(text, models.Value(r'[0-9]+(?:\.[0-9]+)?'), function='substring'),
+        models.FloatField(),
+    )
+    scale = models.Case(
+        *[
+            models.When(IRegex(text, rf'{unit}\s*$'), then=models.Value(float(factor)))
+            for unit, factor in SPEC_UNIT_SCALES.items()
+        ],
+        default=models.Value(1.0),
+        output_field=models.FloatField(),
+    )
+    kind = models.Func(value, function='jsonb_typeof', output_field=models.CharField())
+    return models.Case(
+        models.When(Exact(kind, 'number'), then=Cast(value, models.FloatField())),
+        models.When(
+            Exact(kind, 'string') & IRegex(text, SPEC_NUMBER_PATTERN),
+            then=number * scale,
+        ),
+        output_field=models.FloatField(),
+    )
 
 
 class Product(models.Model):
     id = models.AutoField(primary_key=True)
+    # Supplier SKU; the natural key bulk imports upsert on.
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
     name = models.CharField(max_length=255)
     description = models.TextField()
     price = models.DecimalField(max_digits=13, decimal_places=2)
@@ -28,5 +77,42 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Maintained by a database trigger from name, brand, description and the
+    # text values of specification (see migration 0007).
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        # Every catalog read filters is_deleted=False, so the (sort_key, id)
+        # indexes behind ProductListView only cover live rows.
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='product_live_created_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['price', 'id'], name='product_live_price_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['name', 'id'], name='product_live_name_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['brand', 'created_at', 'id'], name='product_live_brand_new_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['brand', 'price', 'id'], name='product_live_brand_price_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['category', 'created_at', 'id'], name='product_live_cat_new_idx', condition=models.Q(is_deleted=False)),
+            models.Index(fields=['category', 'price', 'id'], name='product_live_cat_price_idx', condition=models.Q(is_deleted=False)),
+            GinIndex(fields=['search_vector'], name='product_live_search_idx', condition=models.Q(is_deleted=False)),
+            GinIndex(fields=['specification'], opclasses=['jsonb_path_ops'], name='product_live_spec_idx', condition=models.Q(is_deleted=False)),
+            models.Index(spec_number('ram'), name='product_live_spec_ram_idx', condition=models.Q(is_deleted=False)),
+            models.Index(spec_number('storage'), name='product_live_spec_storage_idx', condition=models.Q(is_deleted=False)),
+            models.Index(spec_number('screen_size'), name='product_live_spec_screen_idx', condition=models.Q(is_deleted=False)),
+            # Byte-ordered prefix indexes behind /api/products/suggest/
+            models.Index(Collate(Upper('name'), 'C'), name='product_live_name_prefix_idx', condition=models.Q(is_deleted=False)),
+            models.Index(Collate(Upper('brand'), 'C'), name='product_live_brand_prefix_idx', condition=models.Q(is_deleted=False)),
+            # Incremental refresh of the columnar catalog; covers deleted rows too.
+            models.Index(fields=['updated_at'], name='product_updated_idx'),
+        ]
+
     def __str__(self) -> str:
         return self.name
+
+
+class BrandCounter(models.Model):
+    # Live (not soft-deleted) products per brand; kept in step by
+    # products.counters, rebuilt by `manage.py rebuild_product_counters`.
+    brand = models.CharField(max_length=100, unique=True)
+    product_count = models.IntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f'{self.brand} ({self.product_count})'
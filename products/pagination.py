@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import base64
+import datetime
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_page_size(value):
+    if value in (None, ''):
+        return DEFAULT_PAGE_SIZE
+
+    page_size = int(value)
+    if page_size <= 0:
+        raise ValueError("page_size must be a positive integer")
+    return min(page_size, MAX_PAGE_SIZE)
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder cuts datetimes to milliseconds; a truncated cursor
+        # would skip rows created within the same millisecond.
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(value, last_id):
+    payload = json.dumps([value, last_id], cls=CursorEncoder)
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor, parse_value):
+    try:
+        value, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return parse_value(value), int(last_id)
+    except (ValueError, TypeError, ArithmeticError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def keyset_filter(queryset, field, value, last_id, descending=False):
+    # The plain range condition lets the planner start the (field, id) index
+    # scan at the cursor; the OR only breaks ties inside one sort value.
+    if descending:
+        return queryset.filter(**{f'{field}__lte': value}).filter(
+            Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': last_id})
+        )
+    return queryset.filter(**{f'{field}__gte': value}).filter(
+        Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': last_id})
+    )
+
+
+def order_for_keyset(queryset, field, descending=False):
+    if descending:
+        return queryset.order_by(f'-{field}', '-id')
+    return queryset.order_by(field, 'id')
+
+
+def paginate(queryset, field, descending, page_size, cursor=None, parse_value=str):
+    if cursor:
+        value, last_id = decode_cursor(cursor, parse_value)
+        queryset = keyset_filter(queryset, field, value, last_id, descending)
+
+    queryset = order_for_keyset(queryset, field, descending)
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[field], last['id'])
+
+    return rows, next_cursor
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+PRODUCT_FIELDS = (
+    'id', 'name', 'description', 'price',
+    'image_url', 'category_id',
+    'specification', 'brand',
+    'is_in_stock', 'created_at', 'updated_at',
+)
+
+# Default list projection: what a product grid draws. description and
+# specification are only sent when asked for with ?fields=.
+LIST_FIELDS = (
+    'id', 'name', 'price', 'image_url',
+    'category_id', 'brand', 'is_in_stock', 'created_at',
+)
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def parse_fields(value, default):
+    if not value:
+        return default
+
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in PRODUCT_FIELDS]
+    if unknown:
+        raise InvalidFields("Unknown fields: " + ", ".join(unknown))
+    return fields or default
+
+
+def query_fields(fields, *required):
+    # Columns the query itself needs (e.g. cursor keys) on top of the
+    # requested ones; they are stripped again by project_rows().
+    return tuple(dict.fromkeys((*fields, *required)))
+
+
+def project_rows(rows, fields):
+    return [{field: row[field] for field in fields} for row in rows]
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from django.db import transaction
+from django.dispatch import Signal, receiver
+
+from utils.cache import tagged_cache
+from .cache import changed_product_tags
+from .models import Product
+from .suggest import suggestions
+
+# Sent once a write to the catalog has committed. ``products`` lists the
+# affected Product instances, or is None when a bulk write touched too many
+# rows to list and every derived cache should be dropped.
+products_changed = Signal()
+
+
+def notify_products_changed(products=None):
+    transaction.on_commit(
+        lambda: products_changed.send(sender=Product, products=products)
+    )
+
+
+@receiver(products_changed)
+def invalidate_suggestions(sender, products, **kwargs):
+    suggestions.invalidate(products)
+
+
+@receiver(products_changed)
+def invalidate_catalog_cache(sender, products, **kwargs):
+    tagged_cache.invalidate_tags(changed_product_tags(products))
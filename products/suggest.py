@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import string
+
+from django.db.models.functions import Collate, Upper
+
+from utils.cache import LRUCache
+from .models import Product
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 20
+SUGGEST_CACHE_SIZE = 4096
+# Other worker processes are not notified of writes, so entries also expire.
+SUGGEST_CACHE_TTL = 60
+WARM_PREFIXES = string.ascii_uppercase + string.digits
+
+
+def normalize_prefix(prefix):
+    return ' '.join(prefix.split()).upper()
+
+
+def prefix_key(field):
+    # Must match the expression of the product_live_*_prefix_idx indexes.
+    return Collate(Upper(field), 'C')
+
+
+def prefix_range(queryset, field, prefix):
+    # Under the "C" collation every string starting with `prefix` sorts in
+    # [prefix, prefix with its last character bumped), an index range scan.
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return (
+        queryset
+        .alias(prefix_key=prefix_key(field))
+        .filter(prefix_key__gte=prefix, prefix_key__lt=upper_bound)
+        .order_by('prefix_key')
+    )
+
+
+class SuggestionCache:
+    def __init__(self):
+        self._cache = LRUCache(maxsize=SUGGEST_CACHE_SIZE, ttl=SUGGEST_CACHE_TTL)
+
+    def suggest(self, prefix, limit=DEFAULT_LIMIT):
+        prefix = normalize_prefix(prefix)
+        key = (prefix, limit)
+        result = self._cache.get(key)
+        if result is None:
+            result = self._query(prefix, limit)
+            self._cache.set(key, result)
+        return result
+
+    def _query(self, prefix, limit):
+        live = Product.objects.filter(is_deleted=False)
+        products = list(
+            prefix_range(live, 'name', prefix)
+            .values('id', 'name', 'brand')[:limit]
+        )
+        brands = list(
+            prefix_range(live, 'brand', prefix)
+            .values_list('brand', flat=True)
+            .distinct()[:limit]
+        )
+        return {'products': products, 'brands': brands}
+
+    def warm(self):
+        for prefix in WARM_PREFIXES:
+            self.suggest(prefix)
+
+    def invalidate(self, products=None):
+        if products is None:
+            self._cache.clear()
+            return
+
+        values = set()
+        for product in products:
+            values.add(normalize_prefix(product.name or ''))
+            values.add(normalize_prefix(product.brand or ''))
+        self._cache.delete_where(
+            lambda key: any(value.startswith(key[0]) for value in values)
+        )
+
+
+suggestions = SuggestionCache()
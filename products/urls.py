@@ -1,9 +1,16 @@
 from django.urls import path
 from .views import (
     ProductListView,
+    ProductSearchView,
+    ProductSuggestView,
+    ProductFacetsView,
+    BrandListView,
     ProductDetailView,
+    ProductBatchView,
     CreateProductView,
+    ImportProductsView,
     UpdateProductView,
+    BulkUpdateProductView,
     DeleteProductView,
     DeletedProductListView,
     RestoreProductView,
@@ -11,10 +18,17 @@ from .views import (
 
 urlpatterns = [
     path('', ProductListView.as_view(), name='product_list'),
+    path('search/', ProductSearchView.as_view(), name='product_search'),
+    path('suggest/', ProductSuggestView.as_view(), name='product_suggest'),
+    path('facets/', ProductFacetsView.as_view(), name='product_facets'),
+    path('brands/', BrandListView.as_view(), name='brand_list'),
     path('<int:product_id>/', ProductDetailView.as_view(), name='product_detail'),
+    path('batch/', ProductBatchView.as_view(), name='product_batch'),
 
     path('create/', CreateProductView.as_view(), name='create_product'),
+    path('import/', ImportProductsView.as_view(), name='import_products'),
     path('<int:product_id>/update/', UpdateProductView.as_view(), name='update_product'),
+    path('bulk_update/', BulkUpdateProductView.as_view(), name='bulk_update_products'),
     path('<int:product_id>/delete/', DeleteProductView.as_view(), name='delete_product'),
 
     path('deleted/', DeletedProductListView.as_view(), name='list_deleted_products'),
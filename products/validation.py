@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+
+from .models import Product
+
+REQUIRED_FIELDS = ['name', 'price', 'category_id', 'brand']
+UPDATABLE_FIELDS = ['description', 'price', 'image_url', 'is_in_stock', 'specification']
+# Text columns with a max_length, checked here so one bad row cannot make a
+# whole bulk insert fail in the database.
+BOUNDED_FIELDS = ['name', 'brand', 'image_url', 'sku']
+PRICE_FIELD = Product._meta.get_field('price')
+
+
+class ProductValidationError(ValueError):
+    def __init__(self, message, fields=None):
+        super().__init__(message)
+        self.message = message
+        self.fields = fields
+
+    def as_response_data(self):
+        data = {"error": self.message}
+        if self.fields:
+            data["fields"] = self.fields
+        return data
+
+
+def parse_price(value):
+    try:
+        price = Decimal(str(value) if isinstance(value, float) else value)
+        if not price.is_finite():
+            raise InvalidOperation
+        positive = price > 0
+    except (InvalidOperation, TypeError, ValueError):
+        raise ProductValidationError("Price must be a number")
+    if not positive:
+        raise ProductValidationError("Price must be greater than 0")
+
+    try:
+        price = price.quantize(Decimal(1).scaleb(-PRICE_FIELD.decimal_places), ROUND_HALF_UP)
+        PRICE_FIELD.run_validators(price)
+    except (InvalidOperation, ValidationError):
+        raise ProductValidationError(
+            f"Price must have at most {PRICE_FIELD.max_digits - PRICE_FIELD.decimal_places} digits "
+            f"before the decimal point"
+        )
+    return price
+
+
+def check_lengths(cleaned):
+    too_long = [
+        field for field in BOUNDED_FIELDS
+        if len(cleaned.get(field) or '') > Product._meta.get_field(field).max_length
+    ]
+    if too_long:
+        raise ProductValidationError("These fields are too long", too_long)
+
+
+def reject_constant(name):
+    raise ValueError(f"{name} is not valid JSON")
+
+
+def parse_in_stock(value):
+    return str(value).lower() in ['true', '1', 'yes']
+
+
+def parse_specification(value):
+    # CSV cells carry specification as a JSON string.
+    if isinstance(value, str):
+        try:
+            value = json.loads(value, parse_constant=reject_constant) if value.strip() else {}
+        except ValueError:
+            raise ProductValidationError("specification must be a JSON object")
+    if not isinstance(value, dict):
+        raise ProductValidationError("specification must be a JSON object")
+    return value
+
+
+def clean_product_data(data):
+    """Validate a create payload; returns Product field values."""
+    missing_fields = [f for f in REQUIRED_FIELDS if not data.get(f)]
+    if missing_fields:
+        raise ProductValidationError("Missing required fields", missing_fields)
+
+    cleaned = {
+        'name': str(data['name']),
+        'description': str(data.get('description') or ''),
+        'price': parse_price(data['price']),
+        'image_url': str(data.get('image_url') or ''),
+        'category_id': data['category_id'],
+        'specification': parse_specification(data.get('specification') or {}),
+        'brand': str(data['brand']),
+        'is_in_stock': True,
+    }
+    if data.get('is_in_stock') not in (None, ''):
+        cleaned['is_in_stock'] = parse_in_stock(data['is_in_stock'])
+    if data.get('sku'):
+        cleaned['sku'] = str(data['sku']).strip()
+    check_lengths(cleaned)
+    return cleaned
+
+
+def clean_product_update(data, allowed=UPDATABLE_FIELDS):
+    """Validate an update payload; returns the fields to set."""
+    invalid_fields = [field for field in data if field not in allowed]
+    if invalid_fields:
+        raise ProductValidationError("These fields are not allowed to update", invalid_fields)
+
+    cleaned = {}
+    for field in allowed:
+        if field in data:
+            value = data[field]
+            if field == 'price':
+                value = parse_price(value)
+            elif field == 'is_in_stock':
+                value = parse_in_stock(value)
+            cleaned[field] = value
+    check_lengths(cleaned)
+    return cleaned
@@ -3,85 +3,333 @@ from time import timezone
 from urllib import request
 from django.shortcuts import render
 from django.utils import timezone
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import DataError, IntegrityError, transaction
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast, Round
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Product
+from utils.cache import tagged_cache
+from categories.models import Category
+from utils.http import cached_response, compute_etag, etag_response
+from .models import BrandCounter, Product
+from .cache import CATALOG_TAG, PRODUCT_LIST_TAG, detail_tags, list_tags
+from .columnar import columnar_catalog
+from .counters import adjust_counters, counter_key
+from .facets import DEFAULT_PRICE_BUCKET, MIN_PRICE_BUCKET, compute_facets
+from .filters import (
+    FILTER_KEYS,
+    SPEC_PREFIX,
+    InvalidFilter,
+    filter_products,
+    get_sort_option,
+    normalize_filters,
+    split_param,
+)
+from .importer import IMPORT_FORMATS, ProductImporter, check_utf8, guess_format
+from .pagination import InvalidCursor, paginate, parse_page_size
+from .projection import (
+    LIST_FIELDS,
+    PRODUCT_FIELDS,
+    InvalidFields,
+    parse_fields,
+    project_rows,
+    query_fields,
+)
+from .signal import notify_products_changed
+from .suggest import (
+    DEFAULT_LIMIT as DEFAULT_SUGGEST_LIMIT,
+    MAX_LIMIT as MAX_SUGGEST_LIMIT,
+    normalize_prefix,
+    suggestions,
+)
+from .validation import (
+    PRICE_FIELD,
+    UPDATABLE_FIELDS,
+    ProductValidationError,
+    clean_product_data,
+    clean_product_update,
+    parse_in_stock,
+)
 from rest_framework.permissions import IsAdminUser
 from decimal import Decimal, InvalidOperation
+import io
+
+def live_products(fields=PRODUCT_FIELDS):
+    return Product.objects.filter(is_deleted=False).values(*fields)
+
+
+def fields_error(e):
+    return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
 
 class ProductListView(APIView):
     def get(self, request):
+        params = request.query_params
+        key = (
+            'product-list', normalize_filters(params),
+            params.get('sort'), params.get('page_size'), params.get('cursor'),
+            params.get('fields'),
+        )
+        return cached_response(request, key, list_tags(params), lambda: self.build_page(params))
+
+    def build_page(self, params):
+        try:
+            fields = parse_fields(params.get('fields'), LIST_FIELDS)
+            sort_field, descending, parse_value = get_sort_option(params)
+            products = filter_products(
+                live_products(query_fields(fields, 'id', sort_field)), params
+            )
+        except (InvalidFields, InvalidFilter) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            page_size = parse_page_size(params.get('page_size'))
+        except ValueError:
+            return Response(
+                {"error": "page_size must be a positive integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            page = None
+            if settings.COLUMNAR_CATALOG:
+                page = columnar_catalog.page(
+                    params, sort_field, descending, page_size,
+                    cursor=params.get('cursor'),
+                    parse_value=parse_value,
+                )
+            if page is None:
+                rows, next_cursor = paginate(
+                    products, sort_field, descending, page_size,
+                    cursor=params.get('cursor'),
+                    parse_value=parse_value,
+                )
+            else:
+                product_ids, next_cursor = page
+                entries = get_cached_products(product_ids)
+                rows = [entries[i]['data'] for i in product_ids if entries[i]['data'] is not None]
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return {"products": project_rows(rows, fields), "next_cursor": next_cursor}
+
+class ProductSearchView(APIView):
+    def get(self, request):
+        q = (request.query_params.get('q') or '').strip()
+        if not q:
+            return Response(
+                {"error": "q is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            page_size = parse_page_size(request.query_params.get('page_size'))
+        except ValueError:
+            return Response(
+                {"error": "page_size must be a positive integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            fields = parse_fields(request.query_params.get('fields'), LIST_FIELDS)
+        except InvalidFields as e:
+            return fields_error(e)
+
+        query = SearchQuery(q, config='simple', search_type='websearch')
         products = (
             Product.objects
-            .filter(is_deleted=False)
-            .values(
-                'id', 'name', 'description', 'price',
-                'image_url', 'category_id',
-                'specification', 'brand',
-                'is_in_stock', 'created_at', 'updated_at'
+            .filter(is_deleted=False, search_vector=query)
+            # ts_rank() returns real; widen it so cursor values round-trip exactly
+            .annotate(rank=Cast(SearchRank(F('search_vector'), query), FloatField()))
+            .values(*query_fields(fields, 'id'), 'rank')
+        )
+
+        try:
+            rows, next_cursor = paginate(
+                products, 'rank', True, page_size,
+                cursor=request.query_params.get('cursor'),
+                parse_value=float,
             )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {"products": project_rows(rows, (*fields, 'rank')), "next_cursor": next_cursor},
+            status=status.HTTP_200_OK
         )
 
-        #Brand
-        brand_param = request.query_params.get('brand')
-        if brand_param:
-            brand_list = [b.strip() for b in brand_param.split(',') if b.strip()]
-            products = products.filter(brand__in=brand_list)
-        #Category
-        category_param = request.query_params.get('category')
-        if category_param:
-            category_list = [c.strip() for c in category_param.split(',') if c.strip()]
-            products = products.filter(category__name__in=category_list).distinct()
-        #Price
-        min_price = request.query_params.get('min_price')
-        max_price = request.query_params.get('max_price')
-
-        try:
-            if min_price:
-                products = products.filter(price__gte=Decimal(min_price))
-            if max_price:
-                products = products.filter(price__lte=Decimal(max_price))
+class ProductSuggestView(APIView):
+    def get(self, request):
+        prefix = normalize_prefix(request.query_params.get('prefix') or '')
+        if not prefix:
+            return Response(
+                {"error": "prefix is required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = int(request.query_params.get('limit', DEFAULT_SUGGEST_LIMIT))
+            if limit <= 0:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": "limit must be a positive integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        result = suggestions.suggest(prefix, min(limit, MAX_SUGGEST_LIMIT))
+        return Response({"prefix": prefix, **result}, status=status.HTTP_200_OK)
+
+class ProductFacetsView(APIView):
+    def get(self, request):
+        try:
+            bucket_size = Decimal(
+                request.query_params.get('bucket_size') or DEFAULT_PRICE_BUCKET
+            )
+            if not bucket_size.is_finite() or bucket_size < MIN_PRICE_BUCKET:
+                raise InvalidOperation
         except InvalidOperation:
             return Response(
-                {"error": "Invalid price format"},
+                {"error": f"bucket_size must be a number of at least {MIN_PRICE_BUCKET}"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        products = products.values(
-            'id', 'name', 'description', 'price',
-            'image_url', 'category_id',
-            'specification', 'brand',
-            'is_in_stock', 'created_at', 'updated_at'
+        params = request.query_params
+        key = ('product-facets', normalize_filters(params), str(bucket_size))
+        return cached_response(
+            request, key, list_tags(params),
+            lambda: self.build_facets(params, bucket_size)
+        )
+
+    def build_facets(self, params, bucket_size):
+        try:
+            return compute_facets(params, bucket_size)
+        except InvalidFilter as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class BrandListView(APIView):
+    def get(self, request):
+        return cached_response(
+            request, ('brands',), [CATALOG_TAG, PRODUCT_LIST_TAG], self.build_brands
+        )
+
+    def build_brands(self):
+        brands = (
+            BrandCounter.objects
+            .filter(product_count__gt=0)
+            .order_by('-product_count', 'brand')
+            .values('brand', 'product_count')
         )
+        return {"brands": list(brands)}
+
+
+# "Not found / soft-deleted" answers are cached too, but briefly, so probes
+# for missing ids stay off the database.
+NEGATIVE_CACHE_TIMEOUT = 30
+MAX_BATCH_IDS = 100
+
+
+def get_cached_products(product_ids):
+    entry_keys = tagged_cache.entry_keys(
+        {product_id: detail_tags(product_id) for product_id in product_ids}
+    )
+    found = tagged_cache.get_entries(entry_keys.values())
+    entries = {
+        product_id: found[entry_key]
+        for product_id, entry_key in entry_keys.items()
+        if entry_key in found
+    }
+
+    missing = [product_id for product_id in product_ids if product_id not in entries]
+    if missing:
+        rows = {
+            row['id']: row
+            for row in live_products().filter(id__in=missing)
+        }
+        hits, misses = {}, {}
+        for product_id in missing:
+            row = rows.get(product_id)
+            if row is None:
+                entries[product_id] = misses[entry_keys[product_id]] = {'data': None}
+            else:
+                entry = {'data': row, 'etag': compute_etag(row)}
+                entries[product_id] = hits[entry_keys[product_id]] = entry
+        tagged_cache.set_entries(hits)
+        tagged_cache.set_entries(misses, timeout=NEGATIVE_CACHE_TIMEOUT)
+
+    return entries
 
-        return Response(products, status= status.HTTP_200_OK)
 
 class ProductDetailView(APIView):
     def get(self, request, product_id):
         try:
-            product = (
-                Product.objects
-                .filter(is_deleted=False)
-                .values(
-                    'id', 'name', 'description', 'price',
-                    'image_url', 'category_id',
-                    'specification', 'brand',
-                    'is_in_stock', 'created_at', 'updated_at'
-                )
-                .get(id=product_id)
-            )
-            return Response(product, status=status.HTTP_200_OK)
-        except Product.DoesNotExist:
+            fields = parse_fields(request.query_params.get('fields'), PRODUCT_FIELDS)
+        except InvalidFields as e:
+            return fields_error(e)
+
+        entry = get_cached_products([product_id])[product_id]
+        if entry['data'] is None:
             return Response(
                 {"error": "Product not found."},
                 status=status.HTTP_404_NOT_FOUND
             )
+        if fields == PRODUCT_FIELDS:
+            return etag_response(request, entry['data'], entry['etag'])
+
+        data = project_rows([entry['data']], fields)[0]
+        return etag_response(request, data, compute_etag(data))
+
+class ProductBatchView(APIView):
+    def get(self, request):
+        try:
+            fields = parse_fields(request.query_params.get('fields'), PRODUCT_FIELDS)
+        except InvalidFields as e:
+            return fields_error(e)
+
+        try:
+            product_ids = list(dict.fromkeys(
+                int(i) for i in split_param(request.query_params.get('ids') or '')
+            ))
+        except ValueError:
+            return Response(
+                {"error": "ids must be a comma-separated list of integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if not product_ids:
+            return Response({"error": "ids is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(product_ids) > MAX_BATCH_IDS:
+            return Response(
+                {"error": f"At most {MAX_BATCH_IDS} ids per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        entries = get_cached_products(product_ids)
+        found = [entries[i]['data'] for i in product_ids if entries[i]['data'] is not None]
+        data = {
+            "products": project_rows(found, fields),
+            "missing": [i for i in product_ids if entries[i]['data'] is None],
+        }
+        return etag_response(request, data, compute_etag(data))
+
+def to_local(dt):
+    return timezone.localtime(dt).strftime("%Y-%m-%d %H:%M:%S") if dt else None
+
+def format_product_row(row):
+    # Same representation as build_product_data(), for values() rows.
+    for field in ('created_at', 'updated_at'):
+        if field in row:
+            row[field] = to_local(row[field])
+    if 'price' in row:
+        row['price'] = str(row['price'])
+    return row
 
 def build_product_data(product):
-    def to_local(dt):
-        return timezone.localtime(dt).strftime("%Y-%m-%d %H:%M:%S") if dt else None
     return {
         'id': product.id,
         'name': product.name,
@@ -96,41 +344,46 @@ def build_product_data(product):
         'updated_at': to_local(product.updated_at),
     }
     
+# Postgres's name for the unique constraint on Product.sku.
+SKU_CONSTRAINT = 'products_product_sku_key'
+
+
 class CreateProductView(APIView):
     permission_classes = [IsAdminUser]
 
+    @transaction.atomic
     def post(self, request):
-        data = request.data
-        required_fields = ['name', 'price', 'category_id', 'brand' ]
-        missing_fields = [f for f in required_fields if not data.get(f)]
-        if missing_fields:
+        try:
+            cleaned = clean_product_data(request.data)
+        except ProductValidationError as e:
+            return Response(e.as_response_data(), status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            cleaned['category_id'] = int(cleaned['category_id'])
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "category_id must be an integer", "fields": ["category_id"]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # The foreign key is only checked at commit, past any handler here.
+        if not Category.objects.filter(id=cleaned['category_id']).exists():
             return Response(
-                {"error": "Missing required fields", "fields": missing_fields},
+                {"error": "Category not found", "fields": ["category_id"]},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         try:
-            price = Decimal(data['price'])
-            if price <= 0:
-                return Response({"error": "Price must be greater than 0"}, status=400)
-        except (InvalidOperation, TypeError):
-            return Response({"error": "Price must be a number"}, status=400)
-
-        is_in_stock = True
-        if 'is_in_stock' in data:
-            val = str(data['is_in_stock']).lower()
-            is_in_stock = val in ['true', '1', 'yes']
-
-        product = Product.objects.create(
-            name=data['name'],
-            description=data.get('description', ''),
-            price=price,
-            image_url=data.get('image_url', ''),
-            category_id=data['category_id'],
-            specification=data.get('specification', {}),
-            brand=data['brand'],
-            is_in_stock=is_in_stock
-        )
+            with transaction.atomic():
+                product = Product.objects.create(**cleaned)
+        except IntegrityError as e:
+            if getattr(getattr(e.__cause__, 'diag', None), 'constraint_name', None) != SKU_CONSTRAINT:
+                raise
+            return Response(
+                {"error": "A product with this sku already exists.", "fields": ["sku"]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        adjust_counters(added=[counter_key(product)])
+        notify_products_changed([product])
 
         return Response(
             {
@@ -140,46 +393,55 @@ class CreateProductView(APIView):
             status=status.HTTP_201_CREATED
         )
 
-class UpdateProductView(APIView):
+class ImportProductsView(APIView):
     permission_classes = [IsAdminUser]
 
-    allow_field = ['description', 'price', 'image_url', 'is_in_stock', 'specification']
-
-    def patch(self, request, product_id):
-        data = request.data
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({"error": "file is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        invalid_fields = [field for field in data if field not in self.allow_field]
-        if invalid_fields:
+        fmt = request.data.get('format') or guess_format(upload.name)
+        if fmt not in IMPORT_FORMATS:
             return Response(
-                {"error": "These fields are not allowed to update", "fields": invalid_fields},
+                {"error": "format must be one of: " + ", ".join(IMPORT_FORMATS)},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
         try:
-            product = Product.objects.get(id=product_id)
-        except Product.DoesNotExist:
-            return Response({"error": "Product not found."}, status=status.HTTP_404_NOT_FOUND)
+            check_utf8(upload.file)
+        except UnicodeDecodeError:
+            return Response({"error": "file must be UTF-8 encoded"}, status=status.HTTP_400_BAD_REQUEST)
+
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        report = ProductImporter().run(stream, fmt)
+
+        return Response(
+            {"message": "Import finished.", **report},
+            status=status.HTTP_200_OK
+        )
 
-        for field in self.allow_field:
-            if field in data:
-                value = data[field]
+class UpdateProductView(APIView):
+    permission_classes = [IsAdminUser]
 
-                if field == 'price':
-                    try:
-                        price = Decimal(value)
-                        if price <= 0:
-                            return Response({"error": "Price must be greater than 0"}, status=400)
-                        setattr(product, field, price)
-                    except (InvalidOperation, TypeError):
-                        return Response({"error": "Price must be a number"}, status=400)
+    allow_field = UPDATABLE_FIELDS
 
-                elif field == 'is_in_stock':
-                    setattr(product, field, str(value).lower() in ['true', '1', 'yes'])
+    def patch(self, request, product_id):
+        try:
+            cleaned = clean_product_update(request.data, self.allow_field)
+        except ProductValidationError as e:
+            return Response(e.as_response_data(), status=status.HTTP_400_BAD_REQUEST)
 
-                else:
-                    setattr(product, field, value)
+        try:
+            product = Product.objects.get(id=product_id)
+        except Product.DoesNotExist:
+            return Response({"error": "Product not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        for field, value in cleaned.items():
+            setattr(product, field, value)
 
         product.save()
+        notify_products_changed([product])
 
         return Response({
             "message": "Product updated successfully",
@@ -187,15 +449,198 @@ class UpdateProductView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+def parse_product_id(value):
+    # int() rather than str.isdigit(): '²' is a digit int() cannot parse.
+    if isinstance(value, (bool, float)):
+        raise ValueError("Invalid id")
+    return int(value)
+
+
+class BulkUpdateProductView(APIView):
+    permission_classes = [IsAdminUser]
+
+    allow_field = UPDATABLE_FIELDS
+    batch_size = 1000
+    max_price_percent = Decimal('1000')
+    # Smallest price that does not fit numeric(max_digits, decimal_places).
+    price_limit = Decimal(10) ** (PRICE_FIELD.max_digits - PRICE_FIELD.decimal_places)
+    max_reported_ids = 100
+    rule_keys = ('price_percent', 'is_in_stock', 'all_products')
+
+    def patch(self, request):
+        changes = request.data.get('changes')
+        rule = request.data.get('rule')
+        if bool(changes) == bool(rule):
+            return Response(
+                {"error": "Provide either a non-empty 'changes' list or a 'rule'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if rule:
+            return self.apply_rule(rule)
+        return self.apply_changes(changes)
+
+    def apply_changes(self, changes):
+        if not isinstance(changes, list):
+            return Response({"error": "changes must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+
+        cleaned_changes = {}
+        errors = []
+        for index, change in enumerate(changes):
+            try:
+                product_id = parse_product_id(change['id'])
+            except (KeyError, TypeError, ValueError):
+                errors.append({"index": index, "error": "Each change needs an integer id"})
+                continue
+            fields = {k: v for k, v in change.items() if k != 'id'}
+            try:
+                cleaned_changes.setdefault(product_id, {}).update(
+                    clean_product_update(fields, self.allow_field)
+                )
+            except ProductValidationError as e:
+                errors.append({"index": index, **e.as_response_data()})
+
+        if errors:
+            return Response(
+                {"error": "Invalid changes", "changes": errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            products = list(
+                Product.objects
+                .filter(id__in=cleaned_changes)
+                .only('id', 'name', 'brand', 'category_id')
+            )
+            found = {p.id for p in products}
+
+            # One CASE-based UPDATE per batch for every distinct set of
+            # changed fields, instead of a SELECT and save() per product.
+            now = timezone.now()
+            groups = {}
+            for product_id, fields in cleaned_changes.items():
+                if product_id in found and fields:
+                    groups.setdefault(tuple(sorted(fields)), []).append(
+                        Product(id=product_id, updated_at=now, **fields)
+                    )
+            for fields, objs in groups.items():
+                Product.objects.bulk_update(objs, [*fields, 'updated_at'], batch_size=self.batch_size)
+
+            notify_products_changed(products)
+
+        return Response(
+            {
+                "message": "Products updated successfully.",
+                "updated": len(found),
+                "not_found": sorted(set(cleaned_changes) - found),
+            },
+            status=status.HTTP_200_OK
+        )
+
+    def apply_rule(self, rule):
+        if not isinstance(rule, dict):
+            return Response({"error": "rule must be an object"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # A misspelt filter must not silently widen the update.
+        unknown = sorted(
+            k for k in rule
+            if k not in FILTER_KEYS and not k.startswith(SPEC_PREFIX) and k not in self.rule_keys
+        )
+        if unknown:
+            return Response(
+                {"error": "Unknown rule keys", "keys": unknown},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        filters = {k: str(v) for k, v in rule.items() if k in FILTER_KEYS or k.startswith(SPEC_PREFIX)}
+        all_products = rule.get('all_products', False)
+        if not isinstance(all_products, bool):
+            return Response({"error": "all_products must be true or false"}, status=status.HTTP_400_BAD_REQUEST)
+        # Blank filter values are ignored by filter_products(), so they do not count.
+        if bool(normalize_filters(filters)) == all_products:
+            return Response(
+                {
+                    "error": "rule needs at least one filter ("
+                    + ", ".join(FILTER_KEYS) + ", spec.<key>), or all_products: true"
+                    " and no filters to update the whole catalog"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        values = {}
+        if 'price_percent' in rule:
+            try:
+                percent = Decimal(str(rule['price_percent']))
+                if not percent.is_finite() or not -100 < percent <= self.max_price_percent:
+                    raise InvalidOperation
+            except InvalidOperation:
+                return Response(
+                    {"error": f"price_percent must be a number greater than -100 and at most {self.max_price_percent}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            values['price'] = Round(F('price') * (1 + percent / 100), PRICE_FIELD.decimal_places)
+        if 'is_in_stock' in rule:
+            values['is_in_stock'] = parse_in_stock(rule['is_in_stock'])
+        if not values:
+            return Response(
+                {"error": "rule needs price_percent or is_in_stock"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            products = filter_products(Product.objects.filter(is_deleted=False), filters)
+        except InvalidFilter as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if 'price' in values:
+            # Rounding can take a small price to 0, and a large increase can
+            # overflow the column; such a rule is rejected as a whole.
+            out_of_range = list(
+                products.alias(new_price=values['price'])
+                .filter(Q(new_price__lte=0) | Q(new_price__gte=self.price_limit))
+                .order_by('id')
+                .values_list('id', flat=True)[:self.max_reported_ids]
+            )
+            if out_of_range:
+                return self.price_out_of_range(out_of_range)
+
+        try:
+            with transaction.atomic():
+                updated = products.update(updated_at=timezone.now(), **values)
+                if updated:
+                    notify_products_changed()
+        except DataError:
+            # A price changed concurrently past the check above.
+            return self.price_out_of_range([])
+
+        return Response(
+            {"message": "Products updated successfully.", "updated": updated},
+            status=status.HTTP_200_OK
+        )
+
+    def price_out_of_range(self, product_ids):
+        return Response(
+            {
+                "error": f"price_percent would take prices to 0 or below, or to {self.price_limit} or above",
+                "product_ids": product_ids,
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
 class DeleteProductView(APIView):
     permission_classes = [IsAdminUser]
 
+    @transaction.atomic
     def delete(self, request, product_id):
         try:
-            product = Product.objects.get(id=product_id, is_deleted=False)
+            # Row lock: a concurrent delete waits, then finds nothing to
+            # delete, so the counters are only decremented once.
+            product = Product.objects.select_for_update().get(id=product_id, is_deleted=False)
             product.is_deleted = True
             product.deleted_at = timezone.now()
-            product.save(update_fields=['is_deleted', 'deleted_at'])
+            product.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
+            adjust_counters(removed=[counter_key(product)])
+            notify_products_changed([product])
 
             return Response(
                 {"message": "Product soft deleted successfully."},
@@ -211,13 +656,16 @@ class DeleteProductView(APIView):
 class RestoreProductView(APIView):
     permission_classes = [IsAdminUser]
 
+    @transaction.atomic
     def patch(self, request, product_id):
         try:
-            product = Product.objects.get(id=product_id, is_deleted=True)
+            product = Product.objects.select_for_update().get(id=product_id, is_deleted=True)
 
             product.is_deleted = False
             product.deleted_at = None
-            product.save(update_fields=['is_deleted', 'deleted_at'])
+            product.save(update_fields=['is_deleted', 'deleted_at', 'updated_at'])
+            adjust_counters(added=[counter_key(product)])
+            notify_products_changed([product])
 
             return Response(
                 {
@@ -237,11 +685,16 @@ class DeletedProductListView(APIView):
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        products = Product.objects.filter(is_deleted=True)
+        try:
+            fields = parse_fields(request.query_params.get('fields'), PRODUCT_FIELDS)
+        except InvalidFields as e:
+            return fields_error(e)
 
-        data = [build_product_data(p) for p in products]
+        products = Product.objects.filter(is_deleted=True).values(*fields)
+
+        data = [format_product_row(p) for p in products]
 
         return Response(
             {"deleted_products": data},
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with an optional per-entry TTL (seconds)."""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TaggedCache:
+    """Two-tier cache: an in-process LRU (L1) in front of a Django cache
+    backend (L2, shared between processes).
+
+    Entries are stored under their tags' current versions, which live in L2.
+    Invalidating a tag gives it a new version, so every entry stored under
+    it stops matching in all processes at once. Tag versions expire after
+    ``tag_timeout``, so per-id tags of ids that are never asked for again
+    do not pile up in L2; entries never outlive their tags' versions.
+    """
+
+    def __init__(self, alias='default', prefix='tagged', l1_size=2048, timeout=300,
+                 tag_timeout=24 * 60 * 60):
+        self.alias = alias
+        self.prefix = prefix
+        self.timeout = timeout
+        self.tag_timeout = tag_timeout
+        self.l1 = LRUCache(maxsize=l1_size, ttl=timeout)
+
+    @property
+    def l2(self):
+        return caches[self.alias]
+
+    def _tag_key(self, tag):
+        return f'{self.prefix}:tag:{tag}'
+
+    def tag_versions(self, tags):
+        keys = [self._tag_key(tag) for tag in tags]
+        versions = self.l2.get_many(keys)
+        missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+        if missing:
+            # A tag whose version was evicted must not fall back to an old
+            # value, so it starts over with a fresh random one.
+            self.l2.set_many(missing, timeout=self.tag_timeout)
+            versions.update(missing)
+        return [versions[key] for key in keys]
+
+    def _make_entry_key(self, key, tags, versions):
+        digest = hashlib.md5(repr((key, tuple(tags), versions)).encode()).hexdigest()
+        return f'{self.prefix}:entry:{digest}'
+
+    def entry_key(self, key, tags):
+        # Resolve the key before building a value and store under the same
+        # key afterwards, so a tag invalidated meanwhile is never masked.
+        return self._make_entry_key(key, tags, self.tag_versions(tags))
+
+    def entry_keys(self, items):
+        # Same as entry_key() for a {key: tags} mapping, in one L2 round trip.
+        all_tags = list(dict.fromkeys(tag for tags in items.values() for tag in tags))
+        versions = dict(zip(all_tags, self.tag_versions(all_tags)))
+        return {
+            key: self._make_entry_key(key, tags, [versions[tag] for tag in tags])
+            for key, tags in items.items()
+        }
+
+    def get_entry(self, entry_key, default=None):
+        value = self.l1.get(entry_key, _MISSING)
+        if value is _MISSING:
+            value = self.l2.get(entry_key, _MISSING)
+            if value is _MISSING:
+                return default
+            self.l1.set(entry_key, value)
+        return value
+
+    def _entry_timeout(self, timeout):
+        # An entry whose tag version expired first could never be read again.
+        return min(self.timeout if timeout is None else timeout, self.tag_timeout)
+
+    def set_entry(self, entry_key, value, timeout=None):
+        timeout = self._entry_timeout(timeout)
+        self.l2.set(entry_key, value, timeout=timeout)
+        self.l1.set(entry_key, value, ttl=timeout)
+
+    def get_entries(self, entry_keys):
+        found = {}
+        l2_keys = []
+        for entry_key in entry_keys:
+            value = self.l1.get(entry_key, _MISSING)
+            if value is _MISSING:
+                l2_keys.append(entry_key)
+            else:
+                found[entry_key] = value
+
+        if l2_keys:
+            for entry_key, value in self.l2.get_many(l2_keys).items():
+                self.l1.set(entry_key, value)
+                found[entry_key] = value
+        return found
+
+    def set_entries(self, entries, timeout=None):
+        timeout = self._entry_timeout(timeout)
+        if not entries:
+            return
+        self.l2.set_many(entries, timeout=timeout)
+        for entry_key, value in entries.items():
+            self.l1.set(entry_key, value, ttl=timeout)
+
+    def get_or_set(self, key, tags, build, timeout=None):
+        entry_key = self.entry_key(key, tags)
+        value = self.get_entry(entry_key, _MISSING)
+        if value is _MISSING:
+            value = build()
+            self.set_entry(entry_key, value, timeout)
+        return value
+
+    def invalidate_tags(self, tags):
+        self.l2.set_many(
+            {self._tag_key(tag): uuid.uuid4().hex for tag in tags},
+            timeout=self.tag_timeout,
+        )
+
+
+tagged_cache = TaggedCache()
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework import status
+from rest_framework.response import Response
+
+from utils.cache import tagged_cache
+
+
+def compute_etag(data):
+    body = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    return '"%s"' % hashlib.md5(body.encode()).hexdigest()
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(',')]
+    return '*' in candidates or any(
+        tag.removeprefix('W/') == etag for tag in candidates
+    )
+
+
+def etag_response(request, data, etag, status_code=status.HTTP_200_OK):
+    if etag_matches(request, etag):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    return Response(data, status=status_code, headers={'ETag': etag})
+
+
+def cached_response(request, key, tags, build, cache=tagged_cache, timeout=None):
+    """Serve ``build()`` through the tagged cache with ETag/304 handling.
+
+    ``build`` returns the response data, or a Response (e.g. a validation
+    error) that is returned as-is and never cached.
+    """
+    entry_key = cache.entry_key(key, tags)
+    entry = cache.get_entry(entry_key)
+    if entry is None:
+        data = build()
+        if isinstance(data, Response):
+            return data
+        entry = {'data': data, 'etag': compute_etag(data)}
+        cache.set_entry(entry_key, entry, timeout)
+
+    return etag_response(request, entry['data'], entry['etag'])
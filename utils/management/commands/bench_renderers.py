@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from orders.models import Order
+from orders.views import build_order_data
+from products.benchmarking import seed_products, time_call
+from products.views import live_products
+from utils import renderers
+from utils.middleware import BROTLI_QUALITY, brotli
+from utils.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare encode time and response size of DRF's JSONRenderer and the "
+        "orjson renderer, uncompressed and with gzip/brotli, on product list, "
+        "order list and user list payloads. Seeded products are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000,
+                            help="Rows per payload (products are seeded if needed).")
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--output', help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            self.stderr.write("orjson is not installed; both renderers use the stdlib encoder.")
+
+        rows = options['rows']
+        with transaction.atomic():
+            missing = rows - live_products().count()
+            if missing > 0:
+                self.stdout.write(f"Seeding {missing} products...")
+                seed_products(missing)
+            payloads = self.build_payloads(rows)
+            transaction.set_rollback(True)
+
+        report = []
+        for name, data in payloads.items():
+            for renderer in (JSONRenderer(), ORJSONRenderer()):
+                report.append(self.run_case(name, data, renderer, options['repeat']))
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def build_payloads(self, rows):
+        orders = (
+            Order.objects.order_by('-ordered_at')
+            .prefetch_related('items__product')[:rows]
+        )
+        users = get_user_model().objects.values(
+            'id', 'username', 'email', 'first_name', 'last_name', 'phone', 'address',
+            'is_staff', 'is_active', 'date_joined', 'last_login', 'updated_at',
+        )[:rows]
+        return {
+            'products': {"products": list(live_products()[:rows]), "next_cursor": None},
+            'orders': {"orders": [build_order_data(order) for order in orders]},
+            'users': list(users),
+        }
+
+    def run_case(self, name, data, renderer, repeat):
+        body = renderer.render(data)
+        result = {
+            'payload': name,
+            'renderer': type(renderer).__name__,
+            'bytes': len(body),
+            'encode': time_call(lambda: renderer.render(data), repeat),
+            'gzip_bytes': len(gzip.compress(body, compresslevel=6)),
+            'gzip': time_call(lambda: gzip.compress(body, compresslevel=6), repeat),
+        }
+        if brotli is not None:
+            result['br_bytes'] = len(brotli.compress(body, quality=BROTLI_QUALITY))
+            result['br'] = time_call(lambda: brotli.compress(body, quality=BROTLI_QUALITY), repeat)
+
+        line = (
+            f"[{name}] {result['renderer']}: {result['bytes']}B "
+            f"encode p50={result['encode']['p50_ms']}ms p99={result['encode']['p99_ms']}ms, "
+            f"gzip {result['gzip_bytes']}B p50={result['gzip']['p50_ms']}ms"
+        )
+        if brotli is not None:
+            line += f", br {result['br_bytes']}B p50={result['br']['p50_ms']}ms"
+        self.stdout.write(line)
+        return result
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from utils.purge import PURGE_BATCH_SIZE, PURGE_PAUSE, purge_stale_data, stale_querysets
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired OTPs, stale guest carts, idle carts and carts of "
+        "inactive users in small batches, pausing between them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=PURGE_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=PURGE_PAUSE, help="Seconds to sleep between batches.")
+        parser.add_argument('--idle-days', type=int, help="Purge carts not written to for this many days.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count what would be purged.")
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            for label, queryset, _ in stale_querysets(idle_days=options['idle_days']):
+                self.stdout.write(f"{label}: {queryset.count()} to purge")
+            return
+
+        def progress(label, counts):
+            done = ', '.join(f"{model}={count}" for model, count in sorted(counts.items()))
+            self.stdout.write(f"{label}: {done}")
+
+        report = purge_stale_data(
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            idle_days=options['idle_days'],
+            progress=progress,
+        )
+        total = sum(count for counts in report.values() for count in counts.values())
+        self.stdout.write(self.style.SUCCESS(f"Purged {total} rows."))
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+DEFAULT_MIN_SIZE = 1024
+BROTLI_QUALITY = 5
+# Random bytes added to the gzip header, as GZipMiddleware does, so a
+# response's compressed length does not leak secrets (BREACH).
+MAX_RANDOM_BYTES = 100
+
+
+def accepted_encodings(header):
+    """Codings from an Accept-Encoding header that the client did not refuse (q=0)."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def may_carry_secrets(request):
+    # Brotli has no room for random padding, so it is kept to public reads:
+    # anything authenticated, or answering a POST such as a login or token
+    # refresh, is gzipped with the length mitigation instead.
+    return (
+        request.method not in ('GET', 'HEAD')
+        or 'HTTP_AUTHORIZATION' in request.META
+        or bool(request.COOKIES)
+    )
+
+
+def choose_encoding(accepted, allow_brotli=True):
+    if allow_brotli and brotli is not None and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+class CompressionMiddleware:
+    """Brotli/gzip response compression negotiated from Accept-Encoding.
+
+    Like django.middleware.gzip.GZipMiddleware, but prefers brotli for
+    public reads when the package is installed and leaves bodies under
+    COMPRESSION_MIN_SIZE bytes alone, where compression costs more CPU than
+    it saves on the wire.
+    """
+
+    max_random_bytes = MAX_RANDOM_BYTES
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+
+        if response.streaming:
+            # Streams are only gzipped; brotli would need its own chunked encoder.
+            if 'gzip' not in accepted and '*' not in accepted:
+                return response
+            encoding = 'gzip'
+            response.streaming_content = compress_sequence(
+                response.streaming_content, max_random_bytes=self.max_random_bytes
+            )
+            del response.headers['Content-Length']
+        else:
+            encoding = choose_encoding(accepted, allow_brotli=not may_carry_secrets(request))
+            if encoding is None:
+                return response
+            if encoding == 'br':
+                compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+            else:
+                compressed = compress_string(response.content, max_random_bytes=self.max_random_bytes)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The body changed, so a strong validator no longer applies byte-for-byte.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PURGE_BATCH_SIZE = 1000
+PURGE_PAUSE = 0.2
+# Key of the Postgres advisory lock that keeps scheduled purges from
+# running in several processes at once.
+PURGE_LOCK_KEY = 0x70757267
+
+
+def stale_querysets(now=None, idle_days=None):
+    """(label, queryset, keys) for each kind of row to purge.
+
+    ``keys`` is None when the queryset filters on an indexed column and is
+    walked by primary key. Otherwise it is (values, for_values): the rows
+    are deleted a chunk of ``values`` at a time, through the queryset
+    ``for_values(chunk)`` returns.
+    """
+    from accounts.models import EmailOTP, User
+    from cart.guest import GUEST_CART_TIMEOUT
+    from cart.models import Cart, GuestCart
+
+    now = now or timezone.now()
+    idle_days = settings.CART_IDLE_DAYS if idle_days is None else idle_days
+    # is_active has no index: the inactive users are read once, and their
+    # carts found through the unique user_id index.
+    inactive_users = list(User.objects.filter(is_active=False).order_by('pk').values_list('pk', flat=True))
+    return [
+        ('expired OTPs', EmailOTP.objects.filter(expires_at__lt=now), None),
+        ('guest carts', GuestCart.objects.filter(updated_at__lt=now - timedelta(seconds=GUEST_CART_TIMEOUT)), None),
+        # Deleting a cart takes its CartItem rows with it.
+        ('idle carts', Cart.objects.filter(updated_at__lt=now - timedelta(days=idle_days)), None),
+        ('carts of inactive users', Cart.objects.filter(user__is_active=False), (inactive_users, carts_of_inactive_users)),
+    ]
+
+
+def carts_of_inactive_users(user_ids):
+    from accounts.models import User
+    from cart.models import Cart
+
+    # Rechecks is_active by primary key, so a user reactivated since the
+    # ids were read keeps their cart.
+    return Cart.objects.filter(user__in=User.objects.filter(pk__in=user_ids, is_active=False))
+
+
+def _add_counts(deleted, counts):
+    for label, count in counts.items():
+        deleted[label] = deleted.get(label, 0) + count
+
+
+def purge_in_batches(queryset, batch_size=PURGE_BATCH_SIZE, pause=PURGE_PAUSE, progress=None):
+    """Delete ``queryset`` ``batch_size`` primary keys at a time.
+
+    Each batch is its own short transaction and re-applies the queryset's
+    filter, so a row that stopped matching after it was picked (a cart
+    written to meanwhile) is kept. Walks the keys upwards and sleeps
+    ``pause`` seconds between batches. Returns {model label: rows deleted}.
+    """
+    deleted = {}
+    last_pk = None
+    while True:
+        batch = queryset.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        pks = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+
+        with transaction.atomic():
+            _, counts = queryset.filter(pk__in=pks).delete()
+        _add_counts(deleted, counts)
+        last_pk = pks[-1]
+
+        if progress:
+            progress(deleted)
+        if len(pks) < batch_size:
+            return deleted
+        time.sleep(pause)
+
+
+def purge_by_keys(values, for_values, batch_size=PURGE_BATCH_SIZE, pause=PURGE_PAUSE, progress=None):
+    """Delete ``for_values(chunk)`` for ``batch_size`` of ``values`` at a
+    time, sleeping ``pause`` seconds between chunks."""
+    deleted = {}
+    for start in range(0, len(values), batch_size):
+        if start:
+            time.sleep(pause)
+        with transaction.atomic():
+            _, counts = for_values(values[start:start + batch_size]).delete()
+        _add_counts(deleted, counts)
+        if progress:
+            progress(deleted)
+    return deleted
+
+
+def purge_stale_data(batch_size=PURGE_BATCH_SIZE, pause=PURGE_PAUSE, idle_days=None, progress=None):
+    """Run every purge; returns {label: {model label: rows deleted}}."""
+    report = {}
+    for label, queryset, keys in stale_querysets(idle_days=idle_days):
+        report_progress = (lambda counts, label=label: progress(label, counts)) if progress else None
+        if keys is None:
+            report[label] = purge_in_batches(queryset, batch_size, pause, report_progress)
+        else:
+            values, for_values = keys
+            report[label] = purge_by_keys(values, for_values, batch_size, pause, report_progress)
+    return report
+
+
+def run_scheduled_purge():
+    # Only one process purges at a time; the others skip this round.
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', [PURGE_LOCK_KEY])
+        if not cursor.fetchone()[0]:
+            return None
+        try:
+            return purge_stale_data()
+        finally:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [PURGE_LOCK_KEY])
+
+
+def start_purge_scheduler(interval):
+    """Scheduler hook: purge every ``interval`` seconds in a daemon thread.
+
+    Deployments with an external scheduler (cron, a k8s CronJob) can leave
+    PURGE_INTERVAL at 0 and run ``manage.py purge_stale_data`` instead.
+    """
+    def loop():
+        while True:
+            time.sleep(interval)
+            try:
+                report = run_scheduled_purge()
+                if report:
+                    logger.info("Purged stale data: %s", report)
+            except DatabaseError:
+                logger.warning("Scheduled purge failed.", exc_info=True)
+            finally:
+                connections.close_all()
+
+    threading.Thread(target=loop, daemon=True).start()
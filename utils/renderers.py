@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional; fall back to the stdlib-based DRF classes
+    orjson = None
+
+# Types orjson does not handle natively (Decimal, QuerySet, lazy strings...)
+# are converted exactly like DRF's own encoder does it.
+_drf_encoder = JSONEncoder()
+
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Drop-in for DRF's JSONRenderer backed by orjson.
+
+    Output matches JSONRenderer's compact form (Decimal as float, UTC
+    datetimes with a trailing Z). Indented output (``; indent=`` in the
+    Accept header) and installs without orjson go through the stdlib path.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        ret = orjson.dumps(data, default=_drf_encoder.default, option=ORJSON_OPTIONS)
+        # Escaped by JSONRenderer too: valid JSON, but not valid JavaScript.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class ORJSONParser(JSONParser):
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))